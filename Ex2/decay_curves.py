@@ -0,0 +1,171 @@
+import argparse
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# Exercise 2.3 extension - Engagement decay curves by post cohort
+#
+# Every comment is binned by the age of its post at comment time into
+# log-spaced buckets, and grouped by the post's creation cohort (week or
+# month). The whole cohort x age matrix is built with one np.bincount per
+# chunk of comments, so the comments table is streamed exactly once.
+
+WEEK_SECONDS = 7 * 86400
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+WEEK_OFFSET_SECONDS = 3 * 86400
+
+COMMENT_OFFSETS_QUERY = """
+SELECT
+    CAST(strftime('%s', p.created_at) AS INTEGER) as post_ts,
+    CAST(strftime('%s', c.created_at) AS INTEGER) as comment_ts
+FROM comments c
+JOIN posts p ON p.id = c.post_id
+WHERE c.created_at IS NOT NULL;
+"""
+
+
+def age_bucket_edges(min_seconds=60, max_seconds=365 * 86400, buckets_per_decade=3):
+    # Log-spaced upper edges; offsets beyond the last edge land in a final open bucket
+    decades = np.log10(max_seconds / min_seconds)
+    count = int(np.ceil(decades * buckets_per_decade)) + 1
+    return np.unique(np.round(np.logspace(np.log10(min_seconds), np.log10(max_seconds), count)).astype(np.int64))
+
+
+def cohort_keys(timestamps, cohort='week'):
+    # int64 epoch seconds -> integer cohort number (weeks or months since 1970)
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if cohort == 'week':
+        return (timestamps + WEEK_OFFSET_SECONDS) // WEEK_SECONDS
+    if cohort == 'month':
+        return timestamps.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"cohort must be 'week' or 'month', got {cohort!r}")
+
+
+def cohort_label(key, cohort='week'):
+    if cohort == 'week':
+        start = np.datetime64(int(key) * WEEK_SECONDS - WEEK_OFFSET_SECONDS, 's')
+        return str(start.astype('datetime64[D]'))
+    return str(np.datetime64(int(key), 'M'))
+
+
+def _format_duration(seconds):
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size:
+            value = seconds / size
+            return f"{value:.0f}{unit}" if value >= 10 else f"{value:.1f}{unit}".replace('.0', '')
+    return f"{seconds}s"
+
+
+def bucket_labels(edges):
+    labels = [f"<{_format_duration(edges[0])}"]
+    labels += [f"{_format_duration(lo)}-{_format_duration(hi)}" for lo, hi in zip(edges[:-1], edges[1:])]
+    labels.append(f">={_format_duration(edges[-1])}")
+    return labels
+
+
+def _iter_offset_chunks(conn, chunksize):
+    cursor = conn.execute(COMMENT_OFFSETS_QUERY)
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            break
+        yield np.asarray(rows, dtype=np.int64)
+
+
+def decay_matrix(conn, cohort='week', edges=None, chunksize=200_000):
+    """Return a DataFrame of comment counts, cohorts x post-age buckets.
+
+    Comments timestamped before their post are dropped, as in Exercise 2.3.
+    """
+    if edges is None:
+        edges = age_bucket_edges()
+    n_buckets = len(edges) + 1
+
+    first_post, last_post = conn.execute("""
+        SELECT MIN(CAST(strftime('%s', created_at) AS INTEGER)),
+               MAX(CAST(strftime('%s', created_at) AS INTEGER))
+        FROM posts;
+    """).fetchone()
+    if first_post is None:
+        return pd.DataFrame(columns=bucket_labels(edges))
+    first_cohort, last_cohort = cohort_keys([first_post, last_post], cohort)
+    n_cohorts = int(last_cohort - first_cohort) + 1
+
+    counts = np.zeros(n_cohorts * n_buckets, dtype=np.int64)
+    for chunk in _iter_offset_chunks(conn, chunksize):
+        post_ts, comment_ts = chunk[:, 0], chunk[:, 1]
+        age = comment_ts - post_ts
+        valid = age >= 0
+        cohort_idx = cohort_keys(post_ts[valid], cohort) - first_cohort
+        bucket_idx = np.searchsorted(edges, age[valid], side='right')
+        counts += np.bincount(cohort_idx * n_buckets + bucket_idx, minlength=counts.size)
+
+    matrix = pd.DataFrame(
+        counts.reshape(n_cohorts, n_buckets),
+        index=[cohort_label(first_cohort + i, cohort) for i in range(n_cohorts)],
+        columns=bucket_labels(edges)
+    )
+    matrix.index.name = f'{cohort}_cohort'
+    # Cohorts with no comments at all carry no curve
+    return matrix[matrix.sum(axis=1) > 0]
+
+
+def posts_per_cohort(conn, cohort='week'):
+    post_ts = np.asarray(
+        [row[0] for row in conn.execute(
+            "SELECT CAST(strftime('%s', created_at) AS INTEGER) FROM posts WHERE created_at IS NOT NULL;")],
+        dtype=np.int64
+    )
+    keys, counts = np.unique(cohort_keys(post_ts, cohort), return_counts=True)
+    return pd.Series(counts, index=[cohort_label(k, cohort) for k in keys])
+
+
+def plot_decay_curves(matrix, path='engagement_decay_curves.png'):
+    import matplotlib.pyplot as plt
+
+    shares = matrix.div(matrix.sum(axis=1), axis=0)
+    fig, ax = plt.subplots(figsize=(14, 8))
+    image = ax.imshow(shares.values, aspect='auto', cmap='viridis')
+    ax.set_xticks(range(len(shares.columns)))
+    ax.set_xticklabels(shares.columns, rotation=45, ha='right', fontsize=8)
+    step = max(1, len(shares.index) // 20)
+    ax.set_yticks(range(0, len(shares.index), step))
+    ax.set_yticklabels(shares.index[::step], fontsize=8)
+    ax.set_xlabel('Post Age at Comment Time', fontweight='bold')
+    ax.set_ylabel(matrix.index.name.replace('_', ' ').title(), fontweight='bold')
+    ax.set_title('Engagement Decay by Post Cohort (share of cohort comments)', fontweight='bold')
+    fig.colorbar(image, ax=ax, label='Share of Comments')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    print(f"\nVisualization saved as '{path}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cohort-based engagement decay curves")
+    parser.add_argument('--db', default="../database.sqlite")
+    parser.add_argument('--cohort', choices=('week', 'month'), default='month')
+    parser.add_argument('--chunksize', type=int, default=200_000)
+    parser.add_argument('--plot', action='store_true', help="save a cohort x age heatmap")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    matrix = decay_matrix(conn, cohort=args.cohort, chunksize=args.chunksize)
+    post_counts = posts_per_cohort(conn, cohort=args.cohort).reindex(matrix.index).fillna(0)
+    conn.close()
+
+    print(f"Comments per post by {args.cohort} cohort and post age:")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(matrix.div(post_counts.where(post_counts > 0), axis=0).round(3))
+
+    # Platform-wide curve: what share of all comments arrive in each age bucket
+    overall = matrix.sum(axis=0)
+    print("\nOverall share of comments by post age:")
+    for label, share in (overall / overall.sum()).items():
+        print(f"  {label:>12}: {share:6.1%}")
+
+    if args.plot:
+        plot_decay_curves(matrix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import warnings
+import numpy as np
+import pandas as pd
+from loading import read_sql_typed
+
+# Growth forecasting for Exercise 2.1
+#
+# Fits several growth models to a batch of cumulative monthly series at once
+# (rows = series, columns = months), picks the best model per series by
+# rolling-origin backtesting, and corrects its forecast and derives prediction
+# intervals from the backtest errors. Every model is a linear least-squares problem on a design
+# matrix shared by all series, so a fit is one matrix product per model:
+#   polynomial   y = a + b x + c x^2
+#   exponential  log y = a + b x
+#   logistic     log(K / y - 1) = a + b x, best K from a grid per series
+#   piecewise    y = a + b x + c max(0, x - t), best hinge t from a grid
+
+LOGISTIC_CAPACITY_FACTORS = np.geomspace(1.05, 20, 40)
+PIECEWISE_HINGES = np.linspace(0.3, 0.9, 13)
+
+
+def _solve(design, Y):
+    # Least squares for every row of Y against the same design matrix
+    return Y @ np.linalg.pinv(design).T
+
+
+def fit_polynomial(x, Y, x_new, degree=2):
+    coef = _solve(np.vander(x, degree + 1), Y)
+    return coef @ np.vander(x_new, degree + 1).T
+
+
+def fit_exponential(x, Y, x_new):
+    design = np.column_stack([np.ones_like(x), x])
+    coef = _solve(design, np.log(np.maximum(Y, 1.0)))
+    exponent = coef @ np.column_stack([np.ones_like(x_new), x_new]).T
+    return np.exp(np.minimum(exponent, 700))
+
+
+def fit_logistic(x, Y, x_new):
+    design = np.column_stack([np.ones_like(x), x])
+    y_max = np.maximum(Y.max(axis=1, keepdims=True), 1.0)
+    capacity = y_max * LOGISTIC_CAPACITY_FACTORS[None, :]                  # (S, K)
+
+    y = np.clip(Y, 1e-9, None)[:, None, :]                                  # (S, 1, T)
+    z = np.log(np.maximum(capacity[:, :, None] / y - 1, 1e-12))             # (S, K, T)
+    coef = _solve(design, z)                                                # (S, K, 2)
+    fitted = capacity[:, :, None] / (1 + np.exp(np.clip(coef @ design.T, -700, 700)))
+    sse = ((fitted - Y[:, None, :]) ** 2).sum(axis=2)                       # (S, K)
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(len(Y))
+    new_design = np.column_stack([np.ones_like(x_new), x_new])
+    z_new = coef[rows, best] @ new_design.T
+    return capacity[rows, best][:, None] / (1 + np.exp(np.clip(z_new, -700, 700)))
+
+
+def _hinge_designs(x, hinges):
+    ones = np.ones_like(x)
+    return np.stack([np.column_stack([ones, x, np.maximum(0.0, x - t)]) for t in hinges])
+
+
+def fit_piecewise(x, Y, x_new):
+    hinges = x[0] + PIECEWISE_HINGES * (x[-1] - x[0])
+    designs = _hinge_designs(x, hinges)                                     # (H, T, 3)
+    pinvs = np.linalg.pinv(designs)                                         # (H, 3, T)
+    coef = np.einsum('hpt,st->shp', pinvs, Y)                               # (S, H, 3)
+    fitted = np.einsum('htp,shp->sht', designs, coef)
+    sse = ((fitted - Y[:, None, :]) ** 2).sum(axis=2)
+
+    best = sse.argmin(axis=1)
+    rows = np.arange(len(Y))
+    new_designs = _hinge_designs(x_new, hinges)                             # (H, N, 3)
+    return np.einsum('snp,sp->sn', new_designs[best], coef[rows, best])
+
+
+MODELS = {
+    'polynomial': fit_polynomial,
+    'exponential': fit_exponential,
+    'logistic': fit_logistic,
+    'piecewise': fit_piecewise,
+}
+
+
+def _cumulative(predicted, last_value):
+    # A cumulative series can't shrink: never forecast below the last observed value
+    return np.maximum.accumulate(np.maximum(predicted, last_value[:, None]), axis=1)
+
+
+def backtest(x, Y, horizon=6, min_train=12, min_level=10, models=MODELS):
+    """Rolling-origin backtest.
+
+    For every origin o the models are fit on months [:o] and scored on
+    [o:o + horizon]. Returns {model: scaled errors (S, origins, horizon)},
+    where scaled error = (actual - predicted) / last training value.
+    Origins where a series is still below `min_level` (e.g. before a table
+    existed) are NaN, so the ramp-up doesn't swamp the error.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    Y = np.asarray(Y, dtype=np.float64)
+    origins = range(min_train, len(x) - horizon + 1)
+    errors = {}
+    for name, fit in models.items():
+        per_origin = []
+        for origin in origins:
+            level = Y[:, origin - 1]
+            predicted = _cumulative(fit(x[:origin], Y[:, :origin], x[origin:origin + horizon]), level)
+            actual = Y[:, origin:origin + horizon]
+            scaled = (actual - predicted) / np.maximum(level, 1.0)[:, None]
+            scaled[level < min_level] = np.nan
+            per_origin.append(scaled)
+        if per_origin:
+            errors[name] = np.stack(per_origin, axis=1)
+        else:
+            errors[name] = np.empty((len(Y), 0, horizon))
+    return errors
+
+
+def forecast_batch(x, Y, x_new, labels=None, horizon=6, min_train=12, interval=0.8, models=MODELS):
+    """Fit all models, select the best per series and forecast x_new.
+
+    Returns (summary DataFrame, predictions dict) where predictions holds
+    'forecast', 'lower' and 'upper' arrays of shape (S, len(x_new)). x_new
+    may include past points to draw the fitted curve; those get no interval.
+    Future points are shifted by the chosen model's median backtest error,
+    so a model that has consistently under- or over-predicted doesn't carry
+    that bias into the forecast. Series too short to backtest fall back to
+    the polynomial model, uncorrected and with NaN bounds.
+    """
+    # Measure time from the first observation to keep the designs well conditioned
+    x = np.asarray(x, dtype=np.float64)
+    x_new = np.asarray(x_new, dtype=np.float64) - x[0]
+    x = x - x[0]
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    labels = list(range(len(Y))) if labels is None else list(labels)
+    names = list(models)
+
+    errors = backtest(x, Y, horizon=horizon, min_train=min_train, models=models)
+    # Mean absolute scaled error per series and model
+    with np.errstate(invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN series fall back below
+        score = np.stack([np.nanmean(np.abs(errors[name]), axis=(1, 2)) if errors[name].size
+                          else np.full(len(Y), np.nan) for name in names], axis=1)
+    fallback = np.isnan(score).all(axis=1)
+    best = np.where(fallback, names.index('polynomial') if 'polynomial' in names else 0,
+                    np.nanargmin(np.where(np.isnan(score), np.inf, score), axis=1))
+
+    # Points past the last observation are forecasts; earlier ones are the fitted curve
+    future = x_new > x[-1]
+    all_predictions = np.stack([models[name](x, Y, x_new) for name in names])  # (M, S, N)
+    for predicted in all_predictions:
+        predicted[:, future] = _cumulative(predicted[:, future], Y[:, -1])
+    rows = np.arange(len(Y))
+    forecast = all_predictions[best, rows]
+
+    # Bias correction and intervals from the chosen model's backtest errors by
+    # months ahead; steps beyond the backtest horizon widen with
+    # sqrt(steps / horizon). The forecast moves by the median error and the
+    # bounds by the tail quantiles, so the forecast always lies inside its
+    # interval; the cumulative floor and running maximum keep that order.
+    tail = (1 - interval) / 2
+    lower = np.full_like(forecast, np.nan)
+    upper = np.full_like(forecast, np.nan)
+    steps = np.maximum(np.round(x_new - x[-1]), 1)
+    for s in rows:
+        err = errors[names[best[s]]][s]
+        err = err[~np.isnan(err).any(axis=1)]
+        if err.size == 0 or not future.any():
+            continue
+        step_idx = (np.minimum(steps, err.shape[1]) - 1).astype(np.intp)
+        lo_q, median, hi_q = np.quantile(err, [tail, 0.5, 1 - tail], axis=0)[:, step_idx]
+        scale = max(Y[s, -1], 1.0) * np.sqrt(np.maximum(1.0, steps / err.shape[1]))
+        predicted = forecast[s, future]
+        level = Y[s, -1:]
+        lower[s, future] = _cumulative((predicted + (lo_q * scale)[future])[None, :], level)[0]
+        upper[s, future] = _cumulative((predicted + (hi_q * scale)[future])[None, :], level)[0]
+        forecast[s, future] = _cumulative((predicted + (median * scale)[future])[None, :], level)[0]
+
+    summary = pd.DataFrame(score, index=labels, columns=[f'{name}_error' for name in names])
+    summary.insert(0, 'best_model', [names[b] for b in best])
+    summary['last_value'] = Y[:, -1]
+    summary['forecast'] = forecast[:, -1]
+    summary['lower'] = lower[:, -1]
+    summary['upper'] = upper[:, -1]
+    return summary, {'forecast': forecast, 'lower': lower, 'upper': upper}
+
+
+def month_index(months):
+    # Consecutive integer per calendar month, so gaps in the data stay gaps
+    months = pd.to_datetime(pd.Series(months))
+    return (months.dt.year * 12 + months.dt.month - 1).to_numpy(dtype=np.float64)
+
+
+ACTIVITY_BY_SOURCE_QUERY = """
+SELECT DATE(created_at, 'start of month') as month, source, COUNT(*) as count
+FROM (
+    SELECT created_at, 'users' as source FROM users
+    UNION ALL
+    SELECT created_at, 'posts' as source FROM posts
+    UNION ALL
+    SELECT created_at, 'comments' as source FROM comments
+)
+GROUP BY month, source;
+"""
+
+
+def cumulative_rollups(conn):
+    """Cumulative monthly activity as a months x series frame.
+
+    Columns: 'total' and 'table:<users|posts|comments>'. Single locations
+    have too little history to forecast on their own; regional.py plans
+    regions from the total instead.
+    """
+    activity = read_sql_typed(ACTIVITY_BY_SOURCE_QUERY, conn, label='activity by source',
+                              dtypes={'source': 'category'})
+    total = activity.groupby('month')['count'].sum().rename('total')
+    by_table = activity.pivot_table(index='month', columns='source', values='count',
+                                    aggfunc='sum', fill_value=0, observed=True).add_prefix('table:')
+    monthly = pd.concat([total, by_table], axis=1).fillna(0)
+    monthly.index = pd.to_datetime(monthly.index)
+    return monthly.sort_index().cumsum()
+
+
+def main():
+    import argparse
+    import sqlite3
+    import time
+
+    parser = argparse.ArgumentParser(description="Batch growth forecasts for the platform and per table")
+    parser.add_argument('--db', default="../database.sqlite")
+    parser.add_argument('--months', type=int, default=36, help="forecast horizon")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    rollups = cumulative_rollups(conn)
+    conn.close()
+
+    started = time.perf_counter()
+    x = month_index(rollups.index)
+    x_new = np.arange(x[-1] + 1, x[-1] + args.months + 1)
+    summary, _ = forecast_batch(x, rollups.T.to_numpy(), x_new, labels=rollups.columns)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    print(f"Forecast {len(summary)} series {args.months} months ahead in {elapsed_ms:.0f} ms")
+    print(f"Best model counts: {summary['best_model'].value_counts().to_dict()}\n")
+    with pd.option_context('display.width', 200, 'display.max_rows', None, 'display.max_columns', None,
+                           'display.float_format', '{:,.2f}'.format):
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
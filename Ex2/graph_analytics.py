@@ -0,0 +1,417 @@
+import argparse
+import sqlite3
+from multiprocessing import Pool
+import numpy as np
+
+# Exercise 2.4 extension - Graph analytics over follows and engagement
+#
+# Graphs are stored as compact CSR arrays (indptr/indices/weights over dense
+# int32 node numbers) and every algorithm is a handful of whole-array NumPy
+# operations per iteration:
+#   - PageRank by sparse power iteration (np.bincount over the edge list)
+#   - synchronous, weighted label-propagation communities
+#   - triangle counting on the degree-oriented graph, e.g. on mutual follows
+# Each takes `processes`; above 1 the edge or node range is split across a
+# multiprocessing pool that inherits the CSR arrays on fork.
+
+ENGAGEMENT_EDGES_QUERY = """
+SELECT engager_id, content_owner_id, SUM(weight) as engagement_score
+FROM (
+    SELECT c.user_id as engager_id, p.user_id as content_owner_id, 2 as weight
+    FROM comments c
+    JOIN posts p ON c.post_id = p.id
+    WHERE c.user_id != p.user_id
+    UNION ALL
+    SELECT r.user_id as engager_id, p.user_id as content_owner_id, 1 as weight
+    FROM reactions r
+    JOIN posts p ON r.post_id = p.id
+    WHERE r.user_id != p.user_id
+)
+GROUP BY engager_id, content_owner_id;
+"""
+
+
+class CSRGraph:
+    """Directed graph in CSR form; row u holds the out-edges of node u.
+
+    `node_ids[i]` is the original id of dense node i.
+    """
+
+    def __init__(self, indptr, indices, weights, node_ids):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.node_ids = node_ids
+
+    @property
+    def n_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self):
+        return len(self.indices)
+
+    def sources(self):
+        # Row number of every edge, aligned with `indices`
+        return np.repeat(np.arange(self.n_nodes, dtype=np.int32), np.diff(self.indptr))
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def symmetrize(self):
+        # Undirected view: both directions, weights of reciprocal edges summed
+        src = self.sources()
+        return build_csr(np.concatenate([src, self.indices]),
+                         np.concatenate([self.indices, src]),
+                         np.concatenate([self.weights, self.weights]),
+                         n_nodes=self.n_nodes, node_ids=self.node_ids)
+
+    def mutual(self):
+        # Keep only edges u->v whose reverse v->u also exists
+        n = np.int64(self.n_nodes)
+        src = self.sources().astype(np.int64)
+        dst = self.indices.astype(np.int64)
+        keys = src * n + dst  # sorted: rows ascending, columns sorted in build_csr
+        reverse = dst * n + src
+        pos = np.minimum(np.searchsorted(keys, reverse), len(keys) - 1)
+        found = keys[pos] == reverse if len(keys) else np.zeros(0, dtype=bool)
+        return build_csr(src[found], dst[found], self.weights[found],
+                         n_nodes=self.n_nodes, node_ids=self.node_ids)
+
+
+def build_csr(src, dst, weights=None, n_nodes=None, node_ids=None):
+    """Build a CSRGraph from dense int node numbers, summing duplicate edges."""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    weights = np.ones(len(src), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+    if n_nodes is None:
+        n_nodes = int(max(src.max(initial=-1), dst.max(initial=-1))) + 1
+    if node_ids is None:
+        node_ids = np.arange(n_nodes, dtype=np.int64)
+
+    keys = src * n_nodes + dst
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    summed = np.bincount(inverse.ravel(), weights=weights, minlength=len(unique_keys)).astype(np.float32)
+    rows = (unique_keys // n_nodes).astype(np.int32)
+
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_nodes), out=indptr[1:])
+    return CSRGraph(indptr, (unique_keys % n_nodes).astype(np.int32), summed, node_ids)
+
+
+def graph_from_edges(src_ids, dst_ids, weights=None, node_ids=None):
+    """Remap sparse ids to dense int32 node numbers and build the CSR graph."""
+    src_ids = np.asarray(src_ids, dtype=np.int64)
+    dst_ids = np.asarray(dst_ids, dtype=np.int64)
+    if node_ids is None:
+        node_ids = np.unique(np.concatenate([src_ids, dst_ids]))
+    else:
+        node_ids = np.unique(np.asarray(node_ids, dtype=np.int64))
+    src = np.searchsorted(node_ids, src_ids)
+    dst = np.searchsorted(node_ids, dst_ids)
+    return build_csr(src, dst, weights, n_nodes=len(node_ids), node_ids=node_ids)
+
+
+def follows_graph(conn):
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users;")]
+    edges = np.asarray(conn.execute("SELECT follower_id, followed_id FROM follows;").fetchall(),
+                       dtype=np.int64).reshape(-1, 2)
+    user_ids = np.union1d(user_ids, edges.ravel())
+    return graph_from_edges(edges[:, 0], edges[:, 1], node_ids=user_ids)
+
+
+def engagement_graph(conn):
+    user_ids = [row[0] for row in conn.execute("SELECT id FROM users;")]
+    edges = np.asarray(conn.execute(ENGAGEMENT_EDGES_QUERY).fetchall(), dtype=np.int64).reshape(-1, 3)
+    user_ids = np.union1d(user_ids, edges[:, :2].ravel())
+    return graph_from_edges(edges[:, 0], edges[:, 1], edges[:, 2], node_ids=user_ids)
+
+
+# --- multiprocessing plumbing -------------------------------------------------
+
+_shared = {}
+
+
+def _init_worker(arrays):
+    _shared.update(arrays)
+
+
+def _split_range(total, parts):
+    bounds = np.linspace(0, total, parts + 1).astype(np.int64)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def _split_by_cost(cost, parts):
+    # Contiguous node ranges with roughly equal summed cost
+    cumulative = np.concatenate([[0], np.cumsum(cost, dtype=np.float64)])
+    targets = np.linspace(0, cumulative[-1], parts + 1)[1:-1]
+    bounds = np.unique(np.concatenate([[0], np.searchsorted(cumulative, targets), [len(cost)]]))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+# --- PageRank -----------------------------------------------------------------
+
+def _pagerank_push_worker(args):
+    lo, hi, x = args
+    contrib = x[_shared['sources'][lo:hi]] * _shared['weights'][lo:hi]
+    return np.bincount(_shared['indices'][lo:hi], weights=contrib, minlength=len(x))
+
+
+def pagerank(graph, damping=0.85, tol=1e-10, max_iter=100, processes=1):
+    """Weighted PageRank by power iteration. Dangling mass is spread uniformly."""
+    n = graph.n_nodes
+    if n == 0:
+        return np.zeros(0)
+    sources = graph.sources()
+    weights = graph.weights.astype(np.float64)
+    out_weight = np.bincount(sources, weights=weights, minlength=n)
+    dangling = out_weight == 0
+    inv_out = np.where(dangling, 0.0, 1.0 / np.where(dangling, 1.0, out_weight))
+
+    rank = np.full(n, 1.0 / n)
+    pool = None
+    if processes > 1:
+        pool = Pool(processes, initializer=_init_worker,
+                    initargs=({'sources': sources, 'indices': graph.indices, 'weights': weights},))
+        chunks = _split_range(graph.n_edges, processes)
+    try:
+        for _ in range(max_iter):
+            x = rank * inv_out
+            if pool is None:
+                incoming = np.bincount(graph.indices, weights=x[sources] * weights, minlength=n)
+            else:
+                incoming = sum(pool.map(_pagerank_push_worker, [(lo, hi, x) for lo, hi in chunks]))
+            new_rank = (1 - damping) / n + damping * (incoming + rank[dangling].sum() / n)
+            delta = np.abs(new_rank - rank).sum()
+            rank = new_rank
+            if delta < tol:
+                break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return rank
+
+
+# --- Label propagation ----------------------------------------------------------
+
+# A node counts as its own neighbour with this weight. Without it, synchronous
+# updates make weakly tied nodes (e.g. a pair joined by one edge) swap labels
+# every round and never converge; with it the pair ties and both pick the
+# label ranked higher by the tiebreak.
+SELF_VOTE = 1.0
+
+
+def _edges_of(nodes, indptr):
+    # CSR positions of every edge leaving `nodes`, and the node each belongs to
+    counts = indptr[nodes + 1] - indptr[nodes]
+    owners = np.repeat(nodes, counts)
+    starts = np.repeat(indptr[nodes] - (np.cumsum(counts) - counts), counts)
+    return owners, starts + np.arange(len(owners))
+
+
+def _propagate(nodes, labels, indptr, indices, weights, tiebreak):
+    # New label for each of the (sorted, unique) `nodes`: the neighbour label
+    # with the most weight
+    if len(nodes) == 0:
+        return labels[nodes].copy()
+    nodes = nodes.astype(np.int64)
+    owners, positions = _edges_of(nodes, indptr)
+    # Every node also votes for its own label with SELF_VOTE; it guarantees a
+    # candidate per node and keeps synchronous updates from oscillating
+    owners = np.concatenate([owners, nodes])
+    candidate = np.concatenate([labels[indices[positions]], labels[nodes]]).astype(np.int64)
+    votes = np.concatenate([weights[positions].astype(np.float64), np.full(len(nodes), SELF_VOTE)])
+
+    # One sort groups the votes by (owner, label); reduceat sums each group
+    n_labels = np.int64(len(labels))
+    keys = owners * n_labels + candidate
+    order = np.argsort(keys)
+    keys, votes = keys[order], votes[order]
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    totals = np.add.reduceat(votes, starts)
+    keys = keys[starts]
+    key_owner = keys // n_labels
+    key_label = keys % n_labels
+
+    # Per owner: the heaviest label, ties broken by a random label ranking
+    owner_starts = np.flatnonzero(np.concatenate([[True], key_owner[1:] != key_owner[:-1]]))
+    segment = np.repeat(np.arange(len(owner_starts)), np.diff(np.append(owner_starts, len(keys))))
+    is_best = totals >= np.maximum.reduceat(totals, owner_starts)[segment] - 1e-9
+    rank = np.where(is_best, tiebreak[key_label], len(labels))
+    winners = is_best & (rank == np.minimum.reduceat(rank, owner_starts)[segment])
+    # Exactly one winner per owner, already in node order
+    return key_label[winners]
+
+
+def _propagate_worker(args):
+    nodes, labels, tiebreak = args
+    return _propagate(nodes, labels, _shared['indptr'], _shared['indices'], _shared['weights'], tiebreak)
+
+
+def label_propagation(graph, max_iter=30, seed=42, processes=1):
+    """Synchronous weighted label propagation on the undirected view of `graph`.
+
+    Ties are broken by a random label ranking drawn once from `seed`, so a
+    node's vote only depends on its own and its neighbours' labels. Each
+    iteration therefore only revisits nodes next to a label change, and the
+    late iterations touch a small frontier instead of every edge.
+    Returns dense community labels (0..k-1) per node.
+    """
+    undirected = graph.symmetrize()
+    n = undirected.n_nodes
+    labels = np.arange(n, dtype=np.int32)
+    tiebreak = np.random.default_rng(seed).permutation(n)
+    degree = undirected.out_degree()
+
+    pool = None
+    if processes > 1:
+        pool = Pool(processes, initializer=_init_worker,
+                    initargs=({'indptr': undirected.indptr, 'indices': undirected.indices,
+                               'weights': undirected.weights},))
+    try:
+        active = np.arange(n, dtype=np.int64)
+        for _ in range(max_iter):
+            if pool is None:
+                new_labels = _propagate(active, labels, undirected.indptr, undirected.indices,
+                                        undirected.weights, tiebreak)
+            else:
+                chunks = _split_by_cost(degree[active] + 1, processes)
+                new_labels = np.concatenate(pool.map(
+                    _propagate_worker, [(active[lo:hi], labels, tiebreak) for lo, hi in chunks]))
+            moved = new_labels != labels[active]
+            if not moved.any():
+                break
+            moved_nodes = active[moved]
+            labels[moved_nodes] = new_labels[moved]
+            # Next round: the nodes that moved and everyone adjacent to them
+            _, positions = _edges_of(moved_nodes, undirected.indptr)
+            touched = np.zeros(n, dtype=bool)
+            touched[moved_nodes] = True
+            touched[undirected.indices[positions]] = True
+            active = np.flatnonzero(touched)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return np.unique(labels, return_inverse=True)[1].astype(np.int32).ravel()
+
+
+# --- Triangle counting --------------------------------------------------------
+
+def _oriented(graph):
+    # Undirected simple graph with each edge pointing from lower to higher
+    # (degree, id) rank; every triangle is then found exactly once
+    undirected = graph.symmetrize()
+    degree = undirected.out_degree()
+    rank = np.empty(undirected.n_nodes, dtype=np.int64)
+    rank[np.lexsort((np.arange(undirected.n_nodes), degree))] = np.arange(undirected.n_nodes)
+    src = undirected.sources()
+    dst = undirected.indices
+    keep = rank[src] < rank[dst]
+    return build_csr(src[keep], dst[keep], n_nodes=undirected.n_nodes, node_ids=graph.node_ids)
+
+
+def _count_triangles(lo, hi, indptr, indices, edge_keys, n, max_pairs=5_000_000):
+    counts = np.zeros(n, dtype=np.int64)
+    degree = np.diff(indptr)
+    start = lo
+    while start < hi:
+        # Grow the node block until it would expand into too many wedge pairs
+        block_cost = np.cumsum(degree[start:hi].astype(np.int64) ** 2)
+        stop = start + max(1, int(np.searchsorted(block_cost, max_pairs, side='right')))
+        stop = min(stop, hi)
+
+        deg = degree[start:stop]
+        e1 = np.arange(indptr[start], indptr[stop])
+        partners = np.repeat(deg, deg)
+        e1 = np.repeat(e1, partners)
+        owner_start = np.repeat(np.repeat(indptr[start:stop], deg), partners)
+        within = np.arange(len(e1)) - np.repeat(np.cumsum(partners) - partners, partners)
+        e2 = owner_start + within
+
+        v = indices[e1].astype(np.int64)
+        w = indices[e2].astype(np.int64)
+        pair_keys = v * n + w
+        pos = np.minimum(np.searchsorted(edge_keys, pair_keys), max(len(edge_keys) - 1, 0))
+        closed = (edge_keys[pos] == pair_keys) if len(edge_keys) else np.zeros(len(pair_keys), dtype=bool)
+
+        u = np.repeat(np.arange(start, stop, dtype=np.int64), deg.astype(np.int64) ** 2)
+        for members in (u[closed], v[closed], w[closed]):
+            counts += np.bincount(members, minlength=n)
+        start = stop
+    return counts
+
+
+def _count_triangles_worker(args):
+    lo, hi = args
+    return _count_triangles(lo, hi, _shared['indptr'], _shared['indices'], _shared['edge_keys'],
+                            len(_shared['indptr']) - 1)
+
+
+def triangle_count(graph, processes=1):
+    """Count triangles in the undirected view of `graph`.
+
+    Returns (total triangles, per-node triangle counts). Pass graph.mutual()
+    to count reciprocity clusters, i.e. triangles of mutual follows.
+    """
+    oriented = _oriented(graph)
+    n = oriented.n_nodes
+    if oriented.n_edges == 0:
+        return 0, np.zeros(n, dtype=np.int64)
+    edge_keys = oriented.sources().astype(np.int64) * n + oriented.indices
+
+    if processes > 1:
+        chunks = _split_by_cost(oriented.out_degree().astype(np.float64) ** 2, processes)
+        with Pool(processes, initializer=_init_worker,
+                  initargs=({'indptr': oriented.indptr, 'indices': oriented.indices,
+                             'edge_keys': edge_keys},)) as pool:
+            per_node = sum(pool.map(_count_triangles_worker, chunks))
+    else:
+        per_node = _count_triangles(0, n, oriented.indptr, oriented.indices, edge_keys, n)
+
+    return int(per_node.sum() // 3), per_node
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graph analytics over follows and engagement")
+    parser.add_argument('--db', default="../database.sqlite")
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    usernames = dict(conn.execute("SELECT id, username FROM users;").fetchall())
+    follows = follows_graph(conn)
+    engagement = engagement_graph(conn)
+    conn.close()
+
+    def name(graph, node):
+        user_id = int(graph.node_ids[node])
+        return f"{usernames.get(user_id, '?')} (ID: {user_id})"
+
+    print(f"Follows graph: {follows.n_nodes} users, {follows.n_edges} edges")
+    print(f"Engagement graph: {engagement.n_nodes} users, {engagement.n_edges} weighted edges")
+
+    for title, graph in (("follows", follows), ("engagement", engagement)):
+        rank = pagerank(graph, processes=args.processes)
+        print(f"\nTop {args.top} users by PageRank ({title}):")
+        for node in np.argsort(-rank)[:args.top]:
+            print(f"  {name(graph, node)}: {rank[node]:.4f}")
+
+        communities = label_propagation(graph, processes=args.processes)
+        sizes = np.bincount(communities)
+        print(f"Communities ({title}): {len(sizes)}, largest sizes: {np.sort(sizes)[::-1][:5].tolist()}")
+
+    mutual = follows.mutual()
+    total, per_node = triangle_count(mutual, processes=args.processes)
+    print(f"\nMutual follow pairs: {mutual.n_edges // 2}")
+    print(f"Reciprocity clusters (mutual-follow triangles): {total}")
+    for node in np.argsort(-per_node)[:args.top]:
+        if per_node[node] > 0:
+            print(f"  {name(mutual, node)}: in {per_node[node]} triangles")
+
+
+if __name__ == "__main__":
+    main()
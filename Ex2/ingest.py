@@ -0,0 +1,422 @@
+import argparse
+import json
+import queue
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from summaries import SUMMARY_TABLES, WATERMARK_TABLE, base_table_marks, summaries_ready
+from virality_window import prepare_database
+
+# Event-stream ingestion into the social database
+#
+# Reads JSON lines such as
+#   {"type": "post", "user_id": 7, "content": "...", "created_at": "2025-09-16 06:42:23"}
+#   {"type": "comment", "post_id": 2351, "user_id": 12, "content": "..."}
+#   {"type": "reaction", "post_id": 2351, "user_id": 40, "reaction_type": "like"}
+#   {"type": "follow", "follower_id": 40, "followed_id": 7}
+# from a file or stdin and writes them in batched WAL transactions with
+# executemany. The same transaction bumps the incremental summary tables the
+# reports read from, so readers never see base rows without their summaries:
+# monthly_activity_summary feeds task2.1.py, post_engagement_summary and
+# follower_summary feed virality.stream_top_k_virality (report_server /viral).
+# Each transaction also advances the base tables' high-water marks
+# (summaries.py); once anything else writes to them, readers ignore the
+# summaries until the next --rebuild-summaries or ingester start.
+#
+# Malformed events (unknown type, missing or mistyped fields, unparseable
+# created_at) are rejected one by one, and so are comments and reactions on
+# posts that don't exist (one id lookup per batch); rows the database
+# refuses, such as a duplicate post id, are rejected without losing the rest
+# of their batch.
+
+# Required fields and their JSON types per event type
+EVENT_FIELDS = {
+    'post': {'user_id': int, 'content': str},
+    'comment': {'post_id': int, 'user_id': int, 'content': str},
+    'reaction': {'post_id': int, 'user_id': int, 'reaction_type': str},
+    'follow': {'follower_id': int, 'followed_id': int},
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    # WAL lets the analytics scripts keep reading while batches are written
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    return conn
+
+
+def create_summary_tables(conn):
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS post_engagement_summary (
+                post_id        INTEGER PRIMARY KEY,
+                reaction_count INTEGER NOT NULL DEFAULT 0,
+                comment_count  INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS follower_summary (
+                user_id        INTEGER PRIMARY KEY,
+                follower_count INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Same rollup as Exercise 2.1: users + posts + comments per month
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS monthly_activity_summary (
+                month TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+                table_name TEXT PRIMARY KEY,
+                max_rowid  INTEGER NOT NULL,
+                row_count  INTEGER NOT NULL
+            );
+        """)
+
+
+def rebuild_summaries(conn):
+    # Full recompute from the base tables; only needed once before streaming
+    create_summary_tables(conn)
+    with conn:
+        for table in SUMMARY_TABLES:
+            conn.execute(f"DELETE FROM {table};")
+        conn.execute("""
+            INSERT INTO post_engagement_summary (post_id, reaction_count, comment_count)
+            SELECT p.id, COALESCE(r.reaction_count, 0), COALESCE(c.comment_count, 0)
+            FROM posts p
+            LEFT JOIN (SELECT post_id, COUNT(*) as reaction_count
+                       FROM reactions GROUP BY post_id) r ON r.post_id = p.id
+            LEFT JOIN (SELECT post_id, COUNT(*) as comment_count
+                       FROM comments GROUP BY post_id) c ON c.post_id = p.id;
+        """)
+        conn.execute("""
+            INSERT INTO follower_summary (user_id, follower_count)
+            SELECT followed_id, COUNT(*) FROM follows GROUP BY followed_id;
+        """)
+        conn.execute("""
+            INSERT INTO monthly_activity_summary (month, count)
+            SELECT DATE(created_at, 'start of month') as month, COUNT(*)
+            FROM (
+                SELECT created_at FROM users
+                UNION ALL
+                SELECT created_at FROM posts
+                UNION ALL
+                SELECT created_at FROM comments
+            )
+            WHERE created_at IS NOT NULL
+            GROUP BY month;
+        """)
+        conn.execute(f"DELETE FROM {WATERMARK_TABLE};")
+        conn.executemany(f"INSERT INTO {WATERMARK_TABLE} (table_name, max_rowid, row_count) VALUES (?, ?, ?);",
+                         [(table, max_rowid, row_count)
+                          for table, (max_rowid, row_count) in base_table_marks(conn).items()])
+
+
+def is_integer(value):
+    # JSON true/false decode to bool, a subclass of int; SQLite stores signed 64-bit
+    return isinstance(value, int) and not isinstance(value, bool) and -2 ** 63 <= value < 2 ** 63
+
+
+def parse_timestamp(value):
+    """Normalize an ISO 8601 string to UTC 'YYYY-MM-DD HH:MM:SS', or None if it isn't one."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if parsed.year < 1000:
+        # %Y doesn't zero-pad, which would break the 'YYYY-MM' month keys
+        return None
+    return parsed.strftime(TIMESTAMP_FORMAT)
+
+
+class EventBatch:
+    def __init__(self):
+        self.posts = []
+        self.comments = []
+        self.reactions = []
+        self.follows = []
+        self.rejected = 0
+
+    def __len__(self):
+        return len(self.posts) + len(self.comments) + len(self.reactions) + len(self.follows)
+
+    def add(self, event, now):
+        kind = event.get('type')
+        fields = EVENT_FIELDS.get(kind)
+        if fields is None or not all(
+            is_integer(event.get(name)) if expected is int else isinstance(event.get(name), expected)
+            for name, expected in fields.items()
+        ):
+            self.rejected += 1
+            return
+        if kind == 'post' and event.get('id') is not None and not is_integer(event['id']):
+            self.rejected += 1
+            return
+        created_at = now if event.get('created_at') is None else parse_timestamp(event['created_at'])
+        if created_at is None:
+            self.rejected += 1
+            return
+
+        if kind == 'post':
+            self.posts.append((event.get('id'), event['user_id'], event['content'], created_at))
+        elif kind == 'comment':
+            self.comments.append((event['post_id'], event['user_id'], event['content'], created_at))
+        elif kind == 'reaction':
+            self.reactions.append((event['post_id'], event['user_id'], event['reaction_type'], created_at))
+        else:
+            self.follows.append((event['follower_id'], event['followed_id']))
+
+    def drop_unknown_posts(self, conn):
+        """Remove comments and reactions on posts that don't exist and return how many."""
+        referenced = {row[0] for row in self.comments} | {row[0] for row in self.reactions}
+        # Posts with an explicit id in this batch are written before its comments and reactions
+        known = {row[0] for row in self.posts if row[0] is not None}
+        missing = list(referenced - known)
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            known.update(post_id for (post_id,) in
+                         conn.execute(f"SELECT id FROM posts WHERE id IN ({placeholders});", chunk))
+        if referenced <= known:
+            return 0
+        before = len(self.comments) + len(self.reactions)
+        self.comments = [row for row in self.comments if row[0] in known]
+        self.reactions = [row for row in self.reactions if row[0] in known]
+        return before - len(self.comments) - len(self.reactions)
+
+    def rows(self):
+        # Single-row batches, for retrying a batch the database refused
+        for name in ('posts', 'comments', 'reactions', 'follows'):
+            for row in getattr(self, name):
+                single = EventBatch()
+                getattr(single, name).append(row)
+                yield single
+
+
+def write_batch(conn, batch):
+    """Write `batch` in one transaction and return how many rows were rejected.
+
+    Comments and reactions on unknown posts are dropped first. If any row
+    violates a constraint the transaction is rolled back and the batch is
+    retried row by row, so only the offending rows are lost.
+    """
+    rejected = batch.drop_unknown_posts(conn)
+    try:
+        _write(conn, batch)
+        return rejected
+    except sqlite3.IntegrityError:
+        for single in batch.rows():
+            try:
+                _write(conn, single)
+            except sqlite3.IntegrityError:
+                rejected += 1
+        return rejected
+
+
+def _write(conn, batch):
+    reactions_per_post = Counter(row[0] for row in batch.reactions)
+    comments_per_post = Counter(row[0] for row in batch.comments)
+    new_followers = Counter(row[1] for row in batch.follows)
+    # created_at is normalized to TIMESTAMP_FORMAT, so the month key matches DATE(..., 'start of month')
+    activity_per_month = Counter(
+        row[3][:7] + '-01' for row in batch.posts + batch.comments
+    )
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO posts (id, user_id, content, created_at) VALUES (?, ?, ?, ?);",
+            batch.posts
+        )
+        conn.executemany(
+            "INSERT INTO comments (post_id, user_id, content, created_at) VALUES (?, ?, ?, ?);",
+            batch.comments
+        )
+        conn.executemany(
+            "INSERT INTO reactions (post_id, user_id, reaction_type, created_at) VALUES (?, ?, ?, ?);",
+            batch.reactions
+        )
+        conn.executemany(
+            "INSERT INTO follows (follower_id, followed_id) VALUES (?, ?);",
+            batch.follows
+        )
+
+        conn.executemany("""
+            INSERT INTO post_engagement_summary (post_id, reaction_count, comment_count)
+            VALUES (?, ?, ?)
+            ON CONFLICT(post_id) DO UPDATE SET
+                reaction_count = reaction_count + excluded.reaction_count,
+                comment_count = comment_count + excluded.comment_count;
+        """, [(post_id, reactions_per_post[post_id], comments_per_post[post_id])
+              for post_id in reactions_per_post.keys() | comments_per_post.keys()])
+        conn.executemany("""
+            INSERT INTO follower_summary (user_id, follower_count) VALUES (?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                follower_count = follower_count + excluded.follower_count;
+        """, new_followers.items())
+        conn.executemany("""
+            INSERT INTO monthly_activity_summary (month, count) VALUES (?, ?)
+            ON CONFLICT(month) DO UPDATE SET count = count + excluded.count;
+        """, activity_per_month.items())
+
+        # Only this batch's rows are added to the recorded count, so rows written
+        # by anyone else since the last check keep the marks out of step
+        for table, rows in (('posts', batch.posts), ('comments', batch.comments),
+                            ('reactions', batch.reactions), ('follows', batch.follows)):
+            if rows:
+                conn.execute(f"""
+                    UPDATE {WATERMARK_TABLE}
+                    SET row_count = row_count + ?,
+                        max_rowid = (SELECT COALESCE(MAX(rowid), 0) FROM {table})
+                    WHERE table_name = ?;
+                """, (len(rows), table))
+
+
+_END = object()
+
+
+def _read_lines(lines, lines_queue):
+    # Runs in a thread so a quiet stream can't keep a pending batch from flushing.
+    # Lines are handed over in chunks; read1() returns whatever the file or pipe
+    # already has, so the last lines before a lull are never held back.
+    read1 = getattr(getattr(lines, 'buffer', None), 'read1', None)
+    try:
+        if read1 is None:
+            for line in lines:
+                lines_queue.put([line])
+        else:
+            tail = b''
+            while True:
+                data = read1(1 << 16)
+                if not data:
+                    break
+                chunk = (tail + data).split(b'\n')
+                tail = chunk.pop()
+                lines_queue.put(chunk)
+            if tail:
+                lines_queue.put([tail])
+    except BaseException as error:
+        lines_queue.put(error)
+    finally:
+        lines_queue.put(_END)
+
+
+def ingest(conn, lines, batch_size=5000, flush_interval=1.0):
+    """Ingest JSON-line events, committing every `batch_size` events or once
+    the oldest pending event is `flush_interval` seconds old, even if no more
+    lines arrive. KeyboardInterrupt ends the stream like EOF, and the pending
+    batch is written however the loop exits. Returns (written, rejected)."""
+    batch = EventBatch()
+    written = rejected = 0
+    # When the oldest event of the pending batch arrived
+    pending_since = None
+
+    def flush():
+        nonlocal batch, written, rejected, pending_since
+        size, invalid = len(batch), batch.rejected
+        refused = write_batch(conn, batch) if size else 0
+        # Reset right after the commit; an interrupt during the write leaves the batch to retry
+        batch, pending_since = EventBatch(), None
+        written += size - refused
+        rejected += invalid + refused
+
+    lines_queue = queue.Queue(maxsize=64)
+    reader = threading.Thread(target=_read_lines, args=(lines, lines_queue), daemon=True)
+    reader.start()
+    # Default created_at, formatted once per second rather than once per event
+    now_second, now = None, None
+
+    try:
+        while True:
+            try:
+                timeout = None
+                if pending_since is not None:
+                    timeout = max(0.0, flush_interval - (time.monotonic() - pending_since))
+                chunk = lines_queue.get(timeout=timeout)
+            except queue.Empty:
+                flush()
+                continue
+            if chunk is _END:
+                break
+            if isinstance(chunk, BaseException):
+                raise chunk
+
+            for line in chunk:
+                line = line.strip()
+                if not line:
+                    continue
+                second = int(time.time())
+                if second != now_second:
+                    now_second = second
+                    now = datetime.fromtimestamp(second, timezone.utc).strftime(TIMESTAMP_FORMAT)
+                try:
+                    batch.add(json.loads(line), now)
+                except (ValueError, AttributeError):
+                    # JSONDecodeError, or bytes that aren't UTF-8
+                    batch.rejected += 1
+                if pending_since is None and len(batch):
+                    pending_since = time.monotonic()
+                if len(batch) >= batch_size:
+                    flush()
+
+            if pending_since is not None and time.monotonic() - pending_since >= flush_interval:
+                flush()
+    except KeyboardInterrupt:
+        # Ctrl-C, or SIGTERM through main(): keep everything read so far
+        pass
+    finally:
+        flush()
+    return written, rejected
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest JSON-line social events into the database")
+    parser.add_argument('source', nargs='?', default='-', help="JSON-lines file, or - for stdin")
+    parser.add_argument('--db', default="../database.sqlite")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--flush-interval', type=float, default=1.0)
+    parser.add_argument('--rebuild-summaries', action='store_true',
+                        help="recompute summary tables from the base tables first")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    prepare_database(conn)
+    if args.rebuild_summaries or not summaries_ready(conn):
+        rebuild_summaries(conn)
+
+    # Stopping the process flushes the pending batch and prints the stats, as Ctrl-C does
+    signal.signal(signal.SIGTERM, _interrupt)
+    source = sys.stdin if args.source == '-' else open(args.source, encoding='utf-8')
+    started = time.perf_counter()
+    try:
+        written, rejected = ingest(conn, source, args.batch_size, args.flush_interval)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - started
+
+    rate = written / elapsed if elapsed > 0 else 0
+    print(f"Ingested {written:,} events in {elapsed:.2f}s ({rate:,.0f} events/s), "
+          f"rejected {rejected:,}", file=sys.stderr)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+from loading import read_sql_typed
+
+# Per-post content lifecycle computed entirely inside SQLite
+#
+# Every (post, comment) offset is computed in SQL from integer epoch seconds,
+# negative offsets (comments timestamped before their post) are dropped, and
+# window functions rank each post's comments so the median and any
+# time-to-Nth-engagement come out of the same GROUP BY. Only one row per
+# post is returned to Python.
+
+# Seconds between the post and each of its comments
+OFFSETS_CTE = """
+offsets AS (
+    SELECT
+        c.post_id,
+        p.created_at as post_created,
+        CAST(strftime('%s', c.created_at) AS INTEGER)
+            - CAST(strftime('%s', p.created_at) AS INTEGER) as diff
+    FROM posts p
+    JOIN comments c ON p.id = c.post_id
+    WHERE c.created_at IS NOT NULL
+)
+"""
+
+
+def lifecycle_query(nth=()):
+    """Build the per-post lifecycle query.
+
+    `nth` is a sequence of engagement ranks; each adds an
+    `engagement_<n>_seconds` column (NULL when the post has fewer comments).
+    """
+    nth_columns = ''.join(
+        f",\n    MAX(CASE WHEN rn = {int(n)} THEN diff END) as engagement_{int(n)}_seconds"
+        for n in nth
+    )
+    return f"""
+WITH {OFFSETS_CTE},
+ranked AS (
+    SELECT
+        post_id,
+        post_created,
+        diff,
+        ROW_NUMBER() OVER (PARTITION BY post_id ORDER BY diff) as rn,
+        COUNT(*) OVER (PARTITION BY post_id) as n
+    FROM offsets
+    WHERE diff >= 0
+)
+SELECT
+    post_id,
+    MIN(post_created) as post_created,
+    MIN(diff) as first_engagement_seconds,
+    MAX(diff) as last_engagement_seconds,
+    COUNT(*) as engagement_count,
+    AVG(CASE WHEN rn IN ((n + 1) / 2, (n + 2) / 2) THEN diff END) as median_engagement_seconds{nth_columns}
+FROM ranked
+GROUP BY post_id
+ORDER BY post_id;
+"""
+
+
+def lifecycle_overview(conn):
+    """Return (engagement events, posts with engagement, negative offsets) before filtering."""
+    query = f"""
+    WITH {OFFSETS_CTE}
+    SELECT COUNT(*), COUNT(DISTINCT post_id), COALESCE(SUM(diff < 0), 0)
+    FROM offsets;
+    """
+    return conn.execute(query).fetchone()
+
+
+def post_lifecycle_frame(conn, nth=()):
+    for n in nth:
+        if int(n) < 1:
+            raise ValueError(f"engagement rank must be >= 1, got {n}")
+    # Offsets in seconds fit int32 for spans of up to 68 years
+    dtypes = {'post_id': 'int32', 'first_engagement_seconds': 'int32',
+              'last_engagement_seconds': 'int32', 'engagement_count': 'int32'}
+    return read_sql_typed(lifecycle_query(nth), conn, dtypes, label='post lifecycle')
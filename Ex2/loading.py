@@ -0,0 +1,106 @@
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_integer_dtype, union_categoricals
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Typed query loading for the analysis scripts
+#
+# pd.read_sql_query returns int64 and object columns. read_sql_typed reads in
+# chunks and casts each chunk to the declared dtypes as it arrives (int32
+# ids and counts, categoricals for low-cardinality strings), so the untyped
+# copy never exists for the whole result at once. Every load is recorded in
+# LOAD_STATS; print_memory_report() shows the untyped vs typed size per query
+# and the process's peak RSS. Long text should be cut in SQL, e.g.
+# substr(content, 1, 200), rather than loaded whole and sliced in pandas.
+
+# (label, rows, untyped bytes, typed bytes) for every read_sql_typed call
+LOAD_STATS = []
+
+
+def frame_memory(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB on Linux
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def apply_dtypes(frame, dtypes):
+    """Cast the declared columns of `frame` in place and return it.
+
+    Integer targets fall back to the nullable pandas type (e.g. 'Int32')
+    when the column has NULLs, and to 64 bits when the values don't fit.
+    """
+    for column, dtype in dtypes.items():
+        if column not in frame.columns:
+            continue
+        if dtype != 'category' and is_integer_dtype(np.dtype(dtype)):
+            # astype wraps out-of-range integers silently
+            bounds = np.iinfo(np.dtype(dtype))
+            values = frame[column]
+            if values.min() < bounds.min or values.max() > bounds.max:
+                dtype = 'int64'
+            if values.isna().any():
+                dtype = dtype.capitalize()
+        frame[column] = frame[column].astype(dtype)
+    return frame
+
+
+def _combine(chunks, dtypes):
+    if len(chunks) == 1:
+        return chunks[0]
+    # Plain concat would turn categoricals with different categories back into object
+    categorical = [column for column, dtype in dtypes.items()
+                   if dtype == 'category' and column in chunks[0].columns]
+    columns = chunks[0].columns
+    frame = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for column in categorical:
+        frame[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return frame[columns]
+
+
+def read_sql_typed(query, conn, dtypes=None, params=None, chunksize=50_000, label=None):
+    """pd.read_sql_query with per-column target dtypes, cast chunk by chunk.
+
+    `dtypes` maps column names to numpy/pandas dtypes or 'category';
+    undeclared columns keep whatever pandas infers.
+    """
+    dtypes = dtypes or {}
+    untyped_bytes = 0
+    chunks = []
+    for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize):
+        untyped_bytes += frame_memory(chunk)
+        chunks.append(apply_dtypes(chunk, dtypes))
+    if not chunks:
+        # No rows: a non-chunked read still returns the columns
+        chunks = [apply_dtypes(pd.read_sql_query(query, conn, params=params), dtypes)]
+
+    frame = _combine(chunks, dtypes)
+    LOAD_STATS.append((label or query.split()[0], len(frame), untyped_bytes, frame_memory(frame)))
+    return frame
+
+
+def _format_bytes(n):
+    return f"{n / 2 ** 20:,.2f} MB" if n >= 2 ** 20 else f"{n / 2 ** 10:,.1f} KB"
+
+
+def print_memory_report(title="Memory"):
+    print(f"\n{title} (query results, untyped -> typed):")
+    for label, rows, untyped_bytes, typed_bytes in LOAD_STATS:
+        saved = 1 - typed_bytes / untyped_bytes if untyped_bytes else 0
+        print(f"  {label:<24}{rows:>10,} rows  {_format_bytes(untyped_bytes):>11} -> "
+              f"{_format_bytes(typed_bytes):>11} ({saved:.0%} smaller)")
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"  Peak RSS: {peak:,.1f} MB")
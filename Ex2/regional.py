@@ -0,0 +1,197 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from forecasting import forecast_batch, month_index
+
+# Regional capacity planning for Exercise 2.1
+#
+# Splits activity (new users, posts, comments) by the author's users.location
+# and plans servers per region instead of one global pool. Each region is a
+# shard: its locations are queried on a separate read-only connection from a
+# thread pool (sqlite3 releases the GIL while a statement runs), and every
+# query walks indexes only - users(location) to find the region's users, then
+# posts/comments(user_id, created_at) for their activity.
+#
+# A region's load is its peak monthly activity, and servers are split across
+# regions in proportion to it. The future pool is sized exactly as in
+# task2.1.py - today's servers scaled by the forecast growth of cumulative
+# activity, plus redundancy - and each region's peak is projected with the
+# same growth factor, so the regions add up to the script's total.
+
+CURRENT_SERVERS = 16
+REDUNDANCY = 1.20
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_users_location ON users(location, id, created_at);",
+    "CREATE INDEX IF NOT EXISTS idx_posts_user_created ON posts(user_id, created_at);",
+    "CREATE INDEX IF NOT EXISTS idx_comments_user_created ON comments(user_id, created_at);",
+]
+
+
+def ensure_indexes(conn):
+    with conn:
+        for statement in INDEXES:
+            conn.execute(statement)
+
+
+def region_of(location, level='country'):
+    # Locations are "City, Country"; users without one form their own region
+    if not location:
+        return 'Unknown'
+    if level == 'city':
+        return location
+    return location.rsplit(',', 1)[-1].strip()
+
+
+def region_shards(conn, level='country'):
+    """{region: [location, ...]} for every location in users."""
+    shards = {}
+    for (location,) in conn.execute("SELECT DISTINCT location FROM users;"):
+        shards.setdefault(region_of(location, level), []).append(location)
+    return shards
+
+
+def region_activity_query(locations):
+    # NULL never matches IN (...), so the Unknown shard gets its own predicate
+    named = [location for location in locations if location is not None]
+    clauses = []
+    if named:
+        clauses.append(f"u.location IN ({','.join('?' * len(named))})")
+    if len(named) < len(locations):
+        clauses.append("u.location IS NULL")
+    where = ' OR '.join(clauses)
+    query = f"""
+        SELECT month, SUM(count) FROM (
+            SELECT DATE(u.created_at, 'start of month') as month, COUNT(*) as count
+            FROM users u WHERE {where} GROUP BY month
+            UNION ALL
+            SELECT DATE(p.created_at, 'start of month'), COUNT(*)
+            FROM users u JOIN posts p ON p.user_id = u.id WHERE {where} GROUP BY 1
+            UNION ALL
+            SELECT DATE(c.created_at, 'start of month'), COUNT(*)
+            FROM users u JOIN comments c ON c.user_id = u.id WHERE {where} GROUP BY 1
+        )
+        WHERE month IS NOT NULL
+        GROUP BY month;
+    """
+    return query, named * 3
+
+
+def regional_monthly_activity(db_path, shards, workers=4):
+    """Monthly activity per region as a months x regions frame.
+
+    Every shard runs on a read-only connection owned by its pool thread.
+    """
+    db_uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+    local = threading.local()
+
+    def rollup(locations):
+        conn = getattr(local, 'conn', None)
+        if conn is None:
+            conn = local.conn = sqlite3.connect(db_uri, uri=True)
+        query, params = region_activity_query(locations)
+        return dict(conn.execute(query, params).fetchall())
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='shard') as pool:
+        results = list(pool.map(rollup, shards.values()))
+
+    monthly = pd.DataFrame(dict(zip(shards, results))).fillna(0)
+    monthly.index = pd.to_datetime(monthly.index)
+    monthly = monthly.sort_index()
+    # Months with no activity anywhere still count as months
+    full_range = pd.date_range(monthly.index.min(), monthly.index.max(), freq='MS')
+    return monthly.reindex(full_range, fill_value=0).astype(np.int64)
+
+
+def largest_remainder(weights, seats):
+    """Split `seats` integer seats in proportion to `weights` (Hamilton method)."""
+    weights = np.asarray(weights, dtype=np.float64)
+    if seats <= 0 or weights.sum() <= 0:
+        return np.zeros(len(weights), dtype=np.int64)
+    quotas = weights / weights.sum() * seats
+    allocation = np.floor(quotas).astype(np.int64)
+    leftover = seats - allocation.sum()
+    # Ties go to the larger region
+    order = np.lexsort((-weights, -(quotas - allocation)))
+    allocation[order[:leftover]] += 1
+    return allocation
+
+
+def allocate_servers(monthly, months_ahead=36, current_servers=CURRENT_SERVERS, redundancy=REDUNDANCY):
+    """Per-region peak loads and server allocation, now and `months_ahead` out.
+
+    Per-region series are too short and noisy to forecast one by one, so the
+    platform's cumulative activity is forecast as in task2.1.py, every
+    region's peak is scaled by that growth factor and the fleet it needs is
+    split by projected peak. Returns (plan, growth factor, model name).
+    """
+    peak = monthly.max()
+    peak_month = monthly.idxmax()
+
+    # task2.1.py only sees months with activity, so leave the filled-in gaps out
+    total = monthly.sum(axis=1)
+    total = total[total > 0]
+    x = month_index(total.index)
+    x_new = np.array([x[-1] + months_ahead])
+    cumulative = total.cumsum().to_numpy()
+    summary, _ = forecast_batch(x, cumulative[None, :], x_new, labels=['total'])
+    growth_factor = summary['forecast'].iloc[0] / cumulative[-1]
+    projected_servers = int(np.ceil(current_servers * growth_factor * redundancy))
+
+    projected_peak = peak * growth_factor
+
+    plan = pd.DataFrame({
+        'peak_month': peak_month.dt.strftime('%Y-%m'),
+        'peak_load': peak,
+        'servers_now': largest_remainder(peak, current_servers),
+        'projected_peak': projected_peak,
+        'servers_needed': largest_remainder(projected_peak, projected_servers),
+    }, index=monthly.columns)
+    plan = plan.sort_values(['servers_needed', 'peak_load'], ascending=False)
+    return plan, growth_factor, summary['best_model'].iloc[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-region activity and server allocation")
+    parser.add_argument('--db', default="../database.sqlite")
+    parser.add_argument('--level', choices=['country', 'city'], default='country',
+                        help="group user locations by country or keep each city")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent shard queries")
+    parser.add_argument('--months', type=int, default=36, help="planning horizon")
+    parser.add_argument('--top', type=int, default=20, help="regions to print, 0 for all")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    ensure_indexes(conn)
+    shards = region_shards(conn, args.level)
+    conn.close()
+
+    started = time.perf_counter()
+    monthly = regional_monthly_activity(args.db, shards, workers=args.workers)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"Rolled up {len(shards)} regions ({args.level}) over {len(monthly)} months "
+          f"with {args.workers} workers in {elapsed_ms:.0f} ms")
+
+    plan, growth_factor, model = allocate_servers(monthly, months_ahead=args.months)
+    print(f"Servers today: {plan['servers_now'].sum()}, in {args.months} months "
+          f"({growth_factor:.2f}x growth, {model} model, {REDUNDANCY - 1:.0%} redundancy): "
+          f"{plan['servers_needed'].sum()}")
+    hosting = plan[plan['servers_needed'] > 0]
+    print(f"Regions that need their own servers: {len(hosting)} of {len(plan)} "
+          f"({hosting['peak_load'].sum() / plan['peak_load'].sum():.0%} of summed peak load)\n")
+
+    shown = plan if args.top <= 0 else plan.head(args.top)
+    with pd.option_context('display.width', 200, 'display.max_rows', None, 'display.max_columns', None,
+                           'display.float_format', '{:,.2f}'.format):
+        print(shown)
+
+
+if __name__ == "__main__":
+    main()
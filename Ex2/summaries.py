@@ -0,0 +1,38 @@
+# Summary tables maintained by ingest.py
+#
+# Readers (task2.1.py, virality.stream_top_k_virality) only need to know
+# whether the summaries can be used; that check lives here so they don't
+# import the ingestion CLI to make it.
+#
+# The summaries are only correct for the base rows ingest.py has seen. It
+# records a high-water mark per base table (max rowid and row count) in the
+# same transaction as every write, so rows added or deleted by anything else
+# make the marks disagree and the readers fall back to the base tables until
+# the summaries are rebuilt.
+
+SUMMARY_TABLES = ('post_engagement_summary', 'follower_summary', 'monthly_activity_summary')
+WATERMARK_TABLE = 'summary_watermark'
+
+# Every table the summaries are computed from
+BASE_TABLES = ('users', 'posts', 'comments', 'reactions', 'follows')
+
+
+def base_table_marks(conn):
+    """{table: (max rowid, row count)} for the base tables as they are now."""
+    return {table: conn.execute(f"SELECT COALESCE(MAX(rowid), 0), COUNT(*) FROM {table};").fetchone()
+            for table in BASE_TABLES}
+
+
+def summaries_ready(conn):
+    """True if the summary tables exist and cover exactly the current base rows."""
+    tables = SUMMARY_TABLES + (WATERMARK_TABLE,)
+    placeholders = ','.join('?' * len(tables))
+    found = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name IN ({placeholders});",
+        tables
+    ).fetchone()[0]
+    if found != len(tables):
+        return False
+    recorded = {table: (max_rowid, row_count) for table, max_rowid, row_count
+                in conn.execute(f"SELECT table_name, max_rowid, row_count FROM {WATERMARK_TABLE};")}
+    return recorded == base_table_marks(conn)
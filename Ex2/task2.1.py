@@ -2,7 +2,8 @@ import sqlite3
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from datetime import datetime, timedelta
+from forecasting import MODELS, forecast_batch, month_index
+from summaries import summaries_ready
 
 # Connect to database
 db_path = "../database.sqlite"
@@ -27,22 +28,34 @@ GROUP BY month
 ORDER BY month;
 """
 
+# While the ingester's rollup covers every base row, read it instead (see summaries.py)
+if summaries_ready(conn):
+    query = "SELECT month, count FROM monthly_activity_summary ORDER BY month;"
+
 growth_data = pd.read_sql_query(query, conn)
 growth_data['month'] = pd.to_datetime(growth_data['month'])
 
 # Calculate cumulative growth (total activity over time)
 growth_data['cumulative_activity'] = growth_data['count'].cumsum()
 
-# Fit a trend line (linear regression)
-# Convert dates to numeric values for regression
-growth_data['month_numeric'] = (growth_data['month'] - growth_data['month'].min()).dt.days
-
-X = growth_data['month_numeric'].values
+# Fit growth models and pick the best one by rolling-origin backtesting
+# Candidates: polynomial (degree 2), exponential, logistic and piecewise-linear,
+# with the calendar month index as the regressor
+X = month_index(growth_data['month'])
 y = growth_data['cumulative_activity'].values
 
-# Fit polynomial (degree 2 for better fit if growth is accelerating)
-coefficients = np.polyfit(X, y, 2)
-trend_function = np.poly1d(coefficients)
+# Fitted curve over the history plus 3 years ahead, one point per month
+months_in_3_years = 36
+trend_X = np.arange(X[0], X[-1] + months_in_3_years + 1)
+model_summary, predictions = forecast_batch(X, y[None, :], trend_X, labels=['total'])
+best_model = model_summary['best_model'].iloc[0]
+trend_values = predictions['forecast'][0]
+
+print("Model backtest error (mean absolute error / current level, 6 months ahead):")
+for name in MODELS:
+    marker = '  <- selected' if name == best_model else ''
+    print(f"  {name:<12} {model_summary[f'{name}_error'].iloc[0]:.3f}{marker}")
+print()
 
 # Current situation
 current_date = growth_data['month'].max()
@@ -55,15 +68,21 @@ print(f"Current servers: {current_servers}")
 print(f"Activity per server: {current_activity / current_servers:,.0f}")
 
 # Project 3 years into the future
-days_in_3_years = 3 * 365
-future_date = current_date + timedelta(days=days_in_3_years)
-future_month_numeric = X[-1] + days_in_3_years
+future_date = current_date + pd.DateOffset(months=months_in_3_years)
 
-# Predict future activity
-predicted_future_activity = trend_function(future_month_numeric)
+# Predict future activity, corrected by the median backtest error, with the
+# 80% prediction interval from the same errors
+predicted_future_activity = trend_values[-1]
+predicted_lower = predictions['lower'][0, -1]
+predicted_upper = predictions['upper'][0, -1]
 
 print(f"\nProjected date (3 years ahead): {future_date.strftime('%Y-%m-%d')}")
-print(f"Projected cumulative activity: {predicted_future_activity:,.0f}")
+print(f"Projected cumulative activity: {predicted_future_activity:,.0f} ({best_model} model, bias-corrected)")
+has_interval = not np.isnan(predicted_lower)
+if has_interval:
+    print(f"80% prediction interval: {predicted_lower:,.0f} - {predicted_upper:,.0f}")
+else:
+    print("80% prediction interval: not available (too little history to backtest)")
 
 # Calculate growth factor
 growth_factor = predicted_future_activity / current_activity
@@ -77,6 +96,10 @@ servers_with_redundancy = servers_needed_base * 1.20  # Add 20% redundancy
 print(f"\nServers needed (base): {servers_needed_base:.1f}")
 print(f"Servers needed (with 20% redundancy): {servers_with_redundancy:.1f}")
 print(f"Servers to rent (rounded up): {int(np.ceil(servers_with_redundancy))}")
+if has_interval:
+    servers_range = [int(np.ceil(current_servers * bound / current_activity * 1.20))
+                     for bound in (predicted_lower, predicted_upper)]
+    print(f"Servers to rent across the 80% interval: {servers_range[0]} - {servers_range[1]}")
 print(f"Additional servers needed: {int(np.ceil(servers_with_redundancy)) - current_servers}")
 
 # Create visualization
@@ -86,12 +109,14 @@ fig, ax = plt.subplots(figsize=(12, 7))
 ax.plot(growth_data['month'], growth_data['cumulative_activity'], 
         'o-', label='Historical Activity', linewidth=2, markersize=4, color='#2E86AB')
 
-# Plot trend line
-trend_dates = pd.date_range(growth_data['month'].min(), future_date, periods=100)
-trend_numeric = [(d - growth_data['month'].min()).days for d in trend_dates]
-trend_values = trend_function(trend_numeric)
-ax.plot(trend_dates, trend_values, '--', label='Trend Line', 
+# Plot trend line and the prediction interval
+trend_dates = pd.date_range(growth_data['month'].min(), periods=len(trend_X), freq='MS')
+ax.plot(trend_dates, trend_values, '--', label=f'Trend Line ({best_model})', 
         linewidth=2, color='#A23B72', alpha=0.8)
+future_points = trend_dates > current_date
+ax.fill_between(trend_dates[future_points], predictions['lower'][0, future_points],
+                predictions['upper'][0, future_points], color='#A23B72', alpha=0.15,
+                label='80% Prediction Interval')
 
 # Mark current point
 ax.plot(current_date, current_activity, 'o', markersize=12, 
@@ -3,9 +3,18 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+from loading import print_memory_report, read_sql_typed
+from user_dimension import UserDimension
+from virality import (COMPONENT_NAMES, normalization_bounds, normalize_components,
+                      top_k_virality, virality_components)
 
 # Exercise 2.2 - Virality Analysis
 
+# Ranking configuration
+TOP_K = 3
+TOP_N_PLOT = 20
+VIRALITY_WEIGHTS = (0.40, 0.40, 0.20)  # absolute engagement, engagement rate, comment ratio
+
 # Connect to database - adjust path as needed
 db_path = "../database.sqlite"
 conn = sqlite3.connect(db_path)
@@ -32,69 +41,81 @@ print(f"Average reactions per post: {avg_stats['avg_reactions'].iloc[0]:.2f}")
 print(f"Average comments per post: {avg_stats['avg_comments'].iloc[0]:.2f}")
 print(f"Average total engagement per post: {avg_stats['avg_total_engagement'].iloc[0]:.2f}")
 
+# Users are carried as dense int32 indices; usernames are only looked up for display
+users = UserDimension.from_db(conn)
+
 # Get follower count for each user
 follower_query = """
 SELECT followed_id as user_id, COUNT(*) as follower_count
 FROM follows
 GROUP BY followed_id;
 """
-followers = pd.read_sql_query(follower_query, conn)
+followers = users.encode_columns(
+    read_sql_typed(follower_query, conn, {'user_id': 'int32', 'follower_count': 'int32'}, label='followers'),
+    ['user_id'])
+follower_counts = np.bincount(followers['user_idx'], weights=followers['follower_count'], minlength=len(users))
 
 # Calculate virality metrics for all posts
+# Only int32 keys and counts are carried; created_at, content and usernames are
+# fetched for the top posts only
 virality_query = """
 SELECT 
     p.id as post_id,
     p.user_id,
-    u.username,
-    p.content,
-    p.created_at,
-    COUNT(DISTINCT r.id) as reaction_count,
-    COUNT(DISTINCT c.id) as comment_count,
-    (COUNT(DISTINCT r.id) + COUNT(DISTINCT c.id)) as total_engagement,
-    COUNT(DISTINCT c.user_id) as unique_commenters
+    COALESCE(r.reaction_count, 0) as reaction_count,
+    COALESCE(c.comment_count, 0) as comment_count,
+    COALESCE(r.reaction_count, 0) + COALESCE(c.comment_count, 0) as total_engagement,
+    COALESCE(c.unique_commenters, 0) as unique_commenters
 FROM posts p
-JOIN users u ON p.user_id = u.id
-LEFT JOIN reactions r ON p.id = r.post_id
-LEFT JOIN comments c ON p.id = c.post_id
-GROUP BY p.id, p.user_id, u.username, p.content, p.created_at;
+LEFT JOIN (SELECT post_id, COUNT(*) as reaction_count
+           FROM reactions GROUP BY post_id) r ON p.id = r.post_id
+LEFT JOIN (SELECT post_id, COUNT(*) as comment_count, COUNT(DISTINCT user_id) as unique_commenters
+           FROM comments GROUP BY post_id) c ON p.id = c.post_id;
 """
-posts_engagement = pd.read_sql_query(virality_query, conn)
+post_dtypes = {'post_id': 'int32', 'user_id': 'int32', 'reaction_count': 'int32', 'comment_count': 'int32',
+               'total_engagement': 'int32', 'unique_commenters': 'int32'}
+posts_engagement = users.encode_columns(read_sql_typed(virality_query, conn, post_dtypes, label='post engagement'),
+                                        ['user_id'])
 
 print(f"\nTotal posts analyzed: {len(posts_engagement)}")
 
-# Merge with follower data
-posts_engagement = posts_engagement.merge(followers, on='user_id', how='left')
-posts_engagement['follower_count'] = posts_engagement['follower_count'].fillna(0)
+# Look up follower data by user index
+posts_engagement['follower_count'] = follower_counts[posts_engagement['user_idx']]
 
 # Calculate virality score components
 # 1. Engagement rate = total_engagement / (follower_count + 1) 
-posts_engagement['engagement_rate'] = posts_engagement['total_engagement'] / (posts_engagement['follower_count'] + 1)
-
 # 2. Comment ratio = comments / (reactions + 1)
-posts_engagement['comment_ratio'] = posts_engagement['comment_count'] / (posts_engagement['reaction_count'] + 1)
-
-# Normalize metrics to 0-1 scale for fair comparison
-def normalize(series):
-    min_val = series.min()
-    max_val = series.max()
-    if max_val - min_val == 0:
-        return pd.Series([0] * len(series))
-    return (series - min_val) / (max_val - min_val)
-
-posts_engagement['norm_engagement'] = normalize(posts_engagement['total_engagement'])
-posts_engagement['norm_engagement_rate'] = normalize(posts_engagement['engagement_rate'])
-posts_engagement['norm_comment_ratio'] = normalize(posts_engagement['comment_ratio'])
-
-# Calculate composite virality score
-# Weighted combination: 40% absolute engagement, 40% engagement rate, 20% comment ratio
-posts_engagement['virality_score'] = (
-    0.40 * posts_engagement['norm_engagement'] +
-    0.40 * posts_engagement['norm_engagement_rate'] +
-    0.20 * posts_engagement['norm_comment_ratio']
+components = virality_components(
+    posts_engagement['reaction_count'],
+    posts_engagement['comment_count'],
+    posts_engagement['follower_count']
 )
-
-# Sort by virality score and get top 3
-viral_posts = posts_engagement.sort_values('virality_score', ascending=False).head(3)
+posts_engagement['engagement_rate'] = components[:, 1]
+posts_engagement['comment_ratio'] = components[:, 2]
+
+# Rank with a top-k selection instead of scoring and sorting every post
+# Each metric is normalized to 0-1 and combined with VIRALITY_WEIGHTS
+# (default: 40% absolute engagement, 40% engagement rate, 20% comment ratio)
+top_idx, top_scores = top_k_virality(components, k=max(TOP_K, TOP_N_PLOT), weights=VIRALITY_WEIGHTS)
+lo, hi = normalization_bounds([components])
+
+ranked_posts = posts_engagement.iloc[top_idx].copy()
+ranked_posts['virality_score'] = top_scores
+for name, column in zip(COMPONENT_NAMES, normalize_components(components[top_idx], lo, hi).T):
+    ranked_posts[name] = column
+
+viral_posts = ranked_posts.head(TOP_K)
+
+# Display step: attach usernames and fetch created_at and content for the winners only
+viral_posts = users.attach(viral_posts, 'user_idx', 'user').rename(columns={'user_name': 'username'})
+placeholders = ','.join('?' * len(viral_posts))
+post_details = pd.DataFrame(conn.execute(
+    # One character past the preview length is enough to know whether to add '...'
+    f"SELECT id, created_at, substr(content, 1, 201) FROM posts WHERE id IN ({placeholders});",
+    [int(post_id) for post_id in viral_posts['post_id']]
+).fetchall(), columns=['post_id', 'created_at', 'content']).set_index('post_id')
+viral_posts['created_at'] = viral_posts['post_id'].map(post_details['created_at'])
+viral_posts['content'] = viral_posts['post_id'].map(post_details['content'])
 
 for i, (idx, post) in enumerate(viral_posts.iterrows()):
     print(f"RANK #{i + 1}")
@@ -120,20 +141,22 @@ for i, (idx, post) in enumerate(viral_posts.iterrows()):
     multiplier = post['total_engagement'] / avg_engagement
     print(f"\nWhy it's viral: {multiplier:.1f}x more engagement than average post")
 
+print_memory_report()
+
 # Create visualization
 fig, axes = plt.subplots(2, 2, figsize=(14, 10))
-fig.suptitle('Viral Posts Analysis - Top 3 Most Viral Posts', 
+fig.suptitle(f'Viral Posts Analysis - Top {TOP_K} Most Viral Posts', 
              fontsize=16, fontweight='bold', y=0.995)
 
 # Plot 1: Virality Score Comparison (Top 20)
 ax1 = axes[0, 0]
-top_20 = posts_engagement.nlargest(20, 'virality_score')
-colors = ['#C73E1D' if i < 3 else '#2E86AB' for i in range(len(top_20))]
+top_20 = ranked_posts.head(TOP_N_PLOT)
+colors = ['#C73E1D' if i < TOP_K else '#2E86AB' for i in range(len(top_20))]
 bars = ax1.barh(range(len(top_20)), top_20['virality_score'], color=colors)
 ax1.set_yticks(range(len(top_20)))
 ax1.set_yticklabels([f"Post {int(id)}" for id in top_20['post_id']], fontsize=8)
 ax1.set_xlabel('Virality Score', fontweight='bold')
-ax1.set_title('Top 20 Posts by Virality Score', fontweight='bold')
+ax1.set_title(f'Top {len(top_20)} Posts by Virality Score', fontweight='bold')
 ax1.invert_yaxis()
 ax1.grid(axis='x', alpha=0.3)
 
@@ -145,7 +168,7 @@ ax2.scatter(posts_engagement['total_engagement'],
 ax2.scatter(viral_posts['total_engagement'], 
            viral_posts['engagement_rate'],
            s=200, color='#C73E1D', edgecolors='black', linewidths=2,
-           label='Top 3 Viral', zorder=5)
+           label=f'Top {TOP_K} Viral', zorder=5)
 for i, (idx, post) in enumerate(viral_posts.iterrows()):
     ax2.annotate(f"#{i+1}", 
                 xy=(post['total_engagement'], post['engagement_rate']),
@@ -159,9 +182,11 @@ ax2.grid(alpha=0.3)
 
 # Plot 3: Component Breakdown for Top 3
 ax3 = axes[1, 0]
-components = ['Absolute\nEngagement\n(40%)', 'Engagement\nRate\n(40%)', 'Comment\nRatio\n(20%)']
-weights = [0.40, 0.40, 0.20]
-x = np.arange(len(components))
+weights = list(VIRALITY_WEIGHTS)
+component_labels = [f'Absolute\nEngagement\n({weights[0]:.0%})',
+                    f'Engagement\nRate\n({weights[1]:.0%})',
+                    f'Comment\nRatio\n({weights[2]:.0%})']
+x = np.arange(len(component_labels))
 width = 0.25
 
 colors_bars = ['#C73E1D', '#F18F01', '#2E86AB']
@@ -171,13 +196,13 @@ for i, (idx, post) in enumerate(viral_posts.iterrows()):
         post['norm_engagement_rate'] * weights[1],
         post['norm_comment_ratio'] * weights[2]
     ]
-    ax3.bar(x + i*width, values, width, label=f"Rank #{i+1}", color=colors_bars[i])
+    ax3.bar(x + i*width, values, width, label=f"Rank #{i+1}", color=colors_bars[i % len(colors_bars)])
 
 ax3.set_xlabel('Virality Components', fontweight='bold')
 ax3.set_ylabel('Weighted Score Contribution', fontweight='bold')
-ax3.set_title('Virality Score Breakdown (Top 3)', fontweight='bold')
+ax3.set_title(f'Virality Score Breakdown (Top {TOP_K})', fontweight='bold')
 ax3.set_xticks(x + width)
-ax3.set_xticklabels(components, fontsize=9)
+ax3.set_xticklabels(component_labels, fontsize=9)
 ax3.legend()
 ax3.grid(axis='y', alpha=0.3)
 
@@ -196,7 +221,7 @@ ax4.bar(x_pos + width/2, comments, width, label='Comments', color='#A23B72')
 
 ax4.set_xlabel('Post Rank', fontweight='bold')
 ax4.set_ylabel('Count', fontweight='bold')
-ax4.set_title('Reactions vs Comments (Top 3 Viral Posts)', fontweight='bold')
+ax4.set_title(f'Reactions vs Comments (Top {TOP_K} Viral Posts)', fontweight='bold')
 ax4.set_xticks(x_pos)
 ax4.set_xticklabels(rank_labels, fontsize=9)
 ax4.legend()
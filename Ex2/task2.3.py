@@ -4,6 +4,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime
 import os
+from lifecycle import lifecycle_overview, post_lifecycle_frame
+from loading import print_memory_report
 
 # Exercise 2.3 - Content Lifecycle Analysis
 
@@ -11,48 +13,23 @@ import os
 db_path = "../database.sqlite"
 conn = sqlite3.connect(db_path)
 
-# Step 1: Get all engagement events with their timestamps based on comments and posts
+# Step 1: Compute the per-post lifecycle inside SQLite
+# Comment offsets, negative-offset filtering and the per-post min/max/count
+# are all aggregated in SQL, so only one row per post reaches pandas.
+# NTH_ENGAGEMENTS adds time-to-Nth-comment columns on top of first and last.
+NTH_ENGAGEMENTS = (5, 10)
 
-engagement_query = """
-SELECT 
-    p.id as post_id,
-    p.created_at as post_created,
-    c.created_at as engagement_time,
-    'comment' as engagement_type
-FROM posts p
-JOIN comments c ON p.id = c.post_id
-WHERE c.created_at IS NOT NULL;
-"""
-
-# Get all engagement data
-engagements = pd.read_sql_query(engagement_query, conn)
+total_engagements, posts_with_engagement, removed = lifecycle_overview(conn)
 
 print(f"\n--- Analysis Dataset ---")
-print(f"Total engagement events analyzed: {len(engagements)}")
-print(f"Unique posts with engagement: {engagements['post_id'].nunique()}")
-
-# Convert to datetime
-engagements['post_created'] = pd.to_datetime(engagements['post_created'])
-engagements['engagement_time'] = pd.to_datetime(engagements['engagement_time'])
-
-# Calculate time difference in seconds
-engagements['time_diff_seconds'] = (engagements['engagement_time'] - engagements['post_created']).dt.total_seconds()
+print(f"Total engagement events analyzed: {total_engagements}")
+print(f"Unique posts with engagement: {posts_with_engagement}")
 
-# Remove negative time differences (data quality issue)
-original_count = len(engagements)
-engagements = engagements[engagements['time_diff_seconds'] >= 0]
-removed = original_count - len(engagements)
 if removed > 0:
     print(f"Removed {removed} engagements with negative time differences (data quality issue)")
 
-# Calculate first and last engagement for each post
-post_lifecycle = engagements.groupby('post_id').agg({
-    'time_diff_seconds': ['min', 'max', 'count'],
-    'post_created': 'first'
-}).reset_index()
-
-post_lifecycle.columns = ['post_id', 'first_engagement_seconds', 'last_engagement_seconds', 
-                          'engagement_count', 'post_created']
+post_lifecycle = post_lifecycle_frame(conn, nth=NTH_ENGAGEMENTS)
+post_lifecycle['post_created'] = pd.to_datetime(post_lifecycle['post_created'])
 
 # Convert to more readable units
 post_lifecycle['first_engagement_hours'] = post_lifecycle['first_engagement_seconds'] / 3600
@@ -106,6 +83,12 @@ print(f"Total posts analyzed: {len(post_lifecycle)}")
 print(f"Posts with only 1 engagement: {(post_lifecycle['engagement_count'] == 1).sum()}")
 print(f"Posts with 2+ engagements: {(post_lifecycle['engagement_count'] >= 2).sum()}")
 
+print("\nTIME TO NTH ENGAGEMENT")
+for n in NTH_ENGAGEMENTS:
+    nth_hours = post_lifecycle[f'engagement_{n}_seconds'].dropna() / 3600
+    print(f"Engagement #{n}: median {nth_hours.median():.2f} hours "
+          f"({len(nth_hours)} posts reached {n} comments)")
+
 # Distribution statistics
 print("\nDISTRIBUTION STATISTICS")
 print(f"\nFirst Engagement Time:")
@@ -122,6 +105,8 @@ print(f"  50%:  {post_lifecycle['last_engagement_hours'].quantile(0.50):.2f} hou
 print(f"  75%:  {post_lifecycle['last_engagement_hours'].quantile(0.75):.2f} hours")
 print(f"  Max:  {post_lifecycle['last_engagement_hours'].max():.2f} hours")
 
+print_memory_report()
+
 # Create visualizations
 fig, axes = plt.subplots(2, 2, figsize=(14, 10))
 fig.suptitle('Content Lifecycle Analysis', fontsize=16, fontweight='bold', y=0.995)
@@ -1,8 +1,9 @@
 import sqlite3
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+from loading import print_memory_report, read_sql_typed
+from user_dimension import UserDimension
 
 # Exercise 2.4 - User Connections Analysis
 
@@ -10,23 +11,24 @@ import os
 db_path = "../database.sqlite"
 conn = sqlite3.connect(db_path)
 
+# Users are carried as dense int32 indices; usernames are only looked up for display
+users = UserDimension.from_db(conn)
+
 # Step 1: Get all comment engagements (User A comments on User B's post)
 comments_engagement_query = """
 SELECT 
     c.user_id as engager_id,
     p.user_id as content_owner_id,
-    u1.username as engager_username,
-    u2.username as content_owner_username,
     COUNT(*) as comment_count
 FROM comments c
 JOIN posts p ON c.post_id = p.id
-JOIN users u1 ON c.user_id = u1.id
-JOIN users u2 ON p.user_id = u2.id
 WHERE c.user_id != p.user_id  -- Exclude self-engagement
-GROUP BY c.user_id, p.user_id, u1.username, u2.username;
+GROUP BY c.user_id, p.user_id;
 """
 
-comments_engagement = pd.read_sql_query(comments_engagement_query, conn)
+pair_dtypes = {'engager_id': 'int32', 'content_owner_id': 'int32', 'comment_count': 'int32', 'reaction_count': 'int32'}
+comments_engagement = read_sql_typed(comments_engagement_query, conn, pair_dtypes, label='comment pairs')
+comments_engagement = users.encode_columns(comments_engagement, ['engager_id', 'content_owner_id'])
 print(f"\nComment engagement patterns found: {len(comments_engagement)}")
 
 # Step 2: Get all reaction engagements (User A reacts to User B's post)
@@ -34,25 +36,22 @@ reactions_engagement_query = """
 SELECT 
     r.user_id as engager_id,
     p.user_id as content_owner_id,
-    u1.username as engager_username,
-    u2.username as content_owner_username,
     COUNT(*) as reaction_count
 FROM reactions r
 JOIN posts p ON r.post_id = p.id
-JOIN users u1 ON r.user_id = u1.id
-JOIN users u2 ON p.user_id = u2.id
 WHERE r.user_id != p.user_id  -- Exclude self-reactions
-GROUP BY r.user_id, p.user_id, u1.username, u2.username;
+GROUP BY r.user_id, p.user_id;
 """
 
-reactions_engagement = pd.read_sql_query(reactions_engagement_query, conn)
+reactions_engagement = read_sql_typed(reactions_engagement_query, conn, pair_dtypes, label='reaction pairs')
+reactions_engagement = users.encode_columns(reactions_engagement, ['engager_id', 'content_owner_id'])
 print(f"Reaction engagement patterns found: {len(reactions_engagement)}")
 
 # Step 3: Combine comments and reactions with weights
-# Merge the two dataframes
+# Merge the two dataframes on the int32 user keys
 all_engagement = comments_engagement.merge(
     reactions_engagement, 
-    on=['engager_id', 'content_owner_id', 'engager_username', 'content_owner_username'],
+    on=['engager_idx', 'content_owner_idx'],
     how='outer'
 )
 
@@ -71,84 +70,34 @@ print(f"\nTotal unique directional engagements: {len(all_engagement)}")
 # Step 4: Create user pairs and calculate mutual engagement
 # For each pair, we need to sum both directions: A->B and B->A
 
-# Create a normalized pair identifier (always smaller ID first)
-def make_pair_id(row):
-    id1, id2 = row['engager_id'], row['content_owner_id']
-    return tuple(sorted([id1, id2]))
+# Normalized pair (smaller user first); dense indices keep the id order
+all_engagement['user1_idx'] = np.minimum(all_engagement['engager_idx'], all_engagement['content_owner_idx'])
+all_engagement['user2_idx'] = np.maximum(all_engagement['engager_idx'], all_engagement['content_owner_idx'])
 
-all_engagement['pair_id'] = all_engagement.apply(make_pair_id, axis=1)
+# Split each directional row into its user1 -> user2 or user2 -> user1 side
+forward = all_engagement['engager_idx'] == all_engagement['user1_idx']
+for direction, mask in (('user1_to_user2', forward), ('user2_to_user1', ~forward)):
+    all_engagement[f'{direction}_comments'] = all_engagement['comment_count'].where(mask, 0)
+    all_engagement[f'{direction}_reactions'] = all_engagement['reaction_count'].where(mask, 0)
 
 # Group by pair and sum engagement from both directions
-pair_engagement = all_engagement.groupby('pair_id').agg({
-    'engagement_score': 'sum',
-    'comment_count': 'sum',
-    'reaction_count': 'sum'
-}).reset_index()
-
-# Get usernames for each pair
-pair_details = []
-for pair_id in pair_engagement['pair_id']:
-    user1_id, user2_id = pair_id
-    
-    # Get engagements in both directions
-    dir1 = all_engagement[
-        (all_engagement['engager_id'] == user1_id) & 
-        (all_engagement['content_owner_id'] == user2_id)
-    ]
-    dir2 = all_engagement[
-        (all_engagement['engager_id'] == user2_id) & 
-        (all_engagement['content_owner_id'] == user1_id)
-    ]
-    
-    # Get usernames
-    if len(dir1) > 0:
-        user1_name = dir1.iloc[0]['engager_username']
-        user2_name = dir1.iloc[0]['content_owner_username']
-    elif len(dir2) > 0:
-        user1_name = dir2.iloc[0]['content_owner_username']
-        user2_name = dir2.iloc[0]['engager_username']
-    else:
-        # Fallback: query database
-        user1_name = pd.read_sql_query(
-            f"SELECT username FROM users WHERE id = {user1_id}", conn
-        ).iloc[0, 0]
-        user2_name = pd.read_sql_query(
-            f"SELECT username FROM users WHERE id = {user2_id}", conn
-        ).iloc[0, 0]
-    
-    # Calculate engagement in each direction
-    eng1to2_comments = dir1['comment_count'].sum() if len(dir1) > 0 else 0
-    eng1to2_reactions = dir1['reaction_count'].sum() if len(dir1) > 0 else 0
-    eng2to1_comments = dir2['comment_count'].sum() if len(dir2) > 0 else 0
-    eng2to1_reactions = dir2['reaction_count'].sum() if len(dir2) > 0 else 0
-    
-    pair_details.append({
-        'user1_id': user1_id,
-        'user2_id': user2_id,
-        'user1_name': user1_name,
-        'user2_name': user2_name,
-        'user1_to_user2_comments': eng1to2_comments,
-        'user1_to_user2_reactions': eng1to2_reactions,
-        'user2_to_user1_comments': eng2to1_comments,
-        'user2_to_user1_reactions': eng2to1_reactions,
-        'user1_to_user2_score': eng1to2_comments * 2 + eng1to2_reactions,
-        'user2_to_user1_score': eng2to1_comments * 2 + eng2to1_reactions
-    })
-
-pair_details_df = pd.DataFrame(pair_details)
-
-# Merge with engagement scores
-final_pairs = pair_engagement.merge(
-    pair_details_df,
-    left_on='pair_id',
-    right_on=pair_details_df.apply(lambda x: tuple(sorted([x['user1_id'], x['user2_id']])), axis=1)
-)
+final_pairs = all_engagement.groupby(['user1_idx', 'user2_idx'], as_index=False)[[
+    'engagement_score', 'comment_count', 'reaction_count',
+    'user1_to_user2_comments', 'user1_to_user2_reactions',
+    'user2_to_user1_comments', 'user2_to_user1_reactions'
+]].sum()
+
+final_pairs['user1_to_user2_score'] = final_pairs['user1_to_user2_comments'] * 2 + final_pairs['user1_to_user2_reactions']
+final_pairs['user2_to_user1_score'] = final_pairs['user2_to_user1_comments'] * 2 + final_pairs['user2_to_user1_reactions']
 
 # Sort by mutual engagement score
 final_pairs = final_pairs.sort_values('engagement_score', ascending=False)
 
+# Attach user ids and names only to the pairs that are displayed
+top_10 = users.attach(users.attach(final_pairs.head(10), 'user1_idx', 'user1'), 'user2_idx', 'user2')
+
 # Get top 3
-top_3_pairs = final_pairs.head(3)
+top_3_pairs = top_10.head(3)
 
 print(f"\nTotal user pairs with mutual engagement: {len(final_pairs)}")
 print(f"Average mutual engagement score: {final_pairs['engagement_score'].mean():.2f}")
@@ -185,6 +134,8 @@ for i, (idx, pair) in enumerate(top_3_pairs.iterrows()):
     
     print(f"\nEngagement Balance: {balance_desc} ({(1-balance)*100:.1f}% reciprocal)")
 
+print_memory_report()
+
 # Create visualizations
 fig = plt.figure(figsize=(16, 10))
 gs = fig.add_gridspec(3, 3, hspace=0.3, wspace=0.3)
@@ -194,7 +145,6 @@ fig.suptitle('User Connections Analysis - Top 3 Most Connected Pairs',
 
 # Plot 1: Bar chart - Top 10 pairs by engagement score
 ax1 = fig.add_subplot(gs[0, :])
-top_10 = final_pairs.head(10)
 pair_labels = [f"{row['user1_name'][:10]}\n↔\n{row['user2_name'][:10]}" 
                for _, row in top_10.iterrows()]
 colors = ['#C73E1D' if i < 3 else '#2E86AB' for i in range(len(top_10))]
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# In-memory user dimension for the analytics scripts
+#
+# Sparse user ids are mapped to dense int32 indices (position in the sorted
+# id array) and usernames are stored once as a dictionary-encoded
+# pd.Categorical. Analytics frames carry only the int32 index; ids and
+# usernames are attached at the display step with attach().
+
+
+class UserDimension:
+    def __init__(self, user_ids, usernames):
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        order = np.argsort(user_ids, kind='stable')
+        self.user_ids = user_ids[order]
+        self.usernames = pd.Categorical(np.asarray(usernames, dtype=object)[order])
+
+    @classmethod
+    def from_db(cls, conn):
+        rows = conn.execute("SELECT id, username FROM users;").fetchall()
+        user_ids = [row[0] for row in rows]
+        usernames = [row[1] for row in rows]
+        return cls(user_ids, usernames)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def encode(self, user_ids):
+        """Map user ids to dense int32 indices; unknown ids become -1."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if len(self.user_ids) == 0:
+            return np.full(len(user_ids), -1, dtype=np.int32)
+        pos = np.searchsorted(self.user_ids, user_ids)
+        pos = np.minimum(pos, len(self.user_ids) - 1)
+        return np.where(self.user_ids[pos] == user_ids, pos, -1).astype(np.int32)
+
+    def encode_columns(self, frame, columns):
+        """Replace each `<name>_id` column with an int32 `<name>_idx` column.
+
+        Rows referring to users missing from the users table are dropped, the
+        same rows an inner JOIN on users would have dropped.
+        """
+        frame = frame.copy()
+        known = np.ones(len(frame), dtype=bool)
+        for column in columns:
+            idx_column = column[:-3] + '_idx' if column.endswith('_id') else column + '_idx'
+            frame[idx_column] = self.encode(frame[column])
+            known &= frame[idx_column].values >= 0
+            frame = frame.drop(columns=column)
+        return frame[known].reset_index(drop=True)
+
+    def ids(self, idx):
+        return self.user_ids[np.asarray(idx, dtype=np.intp)]
+
+    def names(self, idx):
+        idx = np.asarray(idx, dtype=np.intp)
+        return np.asarray(self.usernames.categories)[self.usernames.codes[idx]]
+
+    def attach(self, frame, idx_column, prefix):
+        """Add `<prefix>_id` and `<prefix>_name` display columns for an index column."""
+        frame = frame.copy()
+        frame[f'{prefix}_id'] = self.ids(frame[idx_column])
+        frame[f'{prefix}_name'] = self.names(frame[idx_column])
+        return frame
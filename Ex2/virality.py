@@ -0,0 +1,146 @@
+import heapq
+import numpy as np
+from summaries import summaries_ready
+
+# Top-k virality ranking shared by Exercise 2.2 and the streaming tools.
+#
+# The virality score is a weighted sum of three min/max-normalized metrics:
+#   0. absolute engagement      = reactions + comments
+#   1. engagement rate          = engagement / (followers + 1)
+#   2. comment ratio            = comments / (reactions + 1)
+# Only the normalization bounds need a full pass over the posts, so the
+# ranking itself never has to score-and-sort a whole frame.
+
+DEFAULT_WEIGHTS = (0.40, 0.40, 0.20)
+COMPONENT_NAMES = ('norm_engagement', 'norm_engagement_rate', 'norm_comment_ratio')
+
+# One row per post. Reactions and comments are pre-aggregated separately so
+# the two LEFT JOINs don't multiply into a reactions x comments product.
+# Posts whose author is missing from users are left out, as in task2.2.py.
+POST_METRICS_QUERY = """
+SELECT
+    p.id as post_id,
+    COALESCE(r.reaction_count, 0) as reaction_count,
+    COALESCE(c.comment_count, 0) as comment_count,
+    COALESCE(f.follower_count, 0) as follower_count
+FROM posts p
+LEFT JOIN (SELECT post_id, COUNT(*) as reaction_count
+           FROM reactions GROUP BY post_id) r ON r.post_id = p.id
+LEFT JOIN (SELECT post_id, COUNT(*) as comment_count
+           FROM comments GROUP BY post_id) c ON c.post_id = p.id
+LEFT JOIN (SELECT followed_id, COUNT(*) as follower_count
+           FROM follows GROUP BY followed_id) f ON f.followed_id = p.user_id
+WHERE p.user_id IN (SELECT id FROM users);
+"""
+
+# Same metrics from the counters ingest.py keeps up to date
+SUMMARY_METRICS_QUERY = """
+SELECT
+    p.id as post_id,
+    COALESCE(s.reaction_count, 0) as reaction_count,
+    COALESCE(s.comment_count, 0) as comment_count,
+    COALESCE(f.follower_count, 0) as follower_count
+FROM posts p
+LEFT JOIN post_engagement_summary s ON s.post_id = p.id
+LEFT JOIN follower_summary f ON f.user_id = p.user_id
+WHERE p.user_id IN (SELECT id FROM users);
+"""
+
+
+def virality_components(reaction_count, comment_count, follower_count):
+    # Raw (un-normalized) metrics as an (n, 3) float array
+    reactions = np.asarray(reaction_count, dtype=np.float64)
+    comments = np.asarray(comment_count, dtype=np.float64)
+    followers = np.asarray(follower_count, dtype=np.float64)
+
+    components = np.empty((len(reactions), 3), dtype=np.float64)
+    components[:, 0] = reactions + comments
+    components[:, 1] = components[:, 0] / (followers + 1)
+    components[:, 2] = comments / (reactions + 1)
+    return components
+
+
+def normalization_bounds(chunks):
+    # Running per-column min/max over an iterable of (n, 3) component chunks
+    lo = np.full(3, np.inf)
+    hi = np.full(3, -np.inf)
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        np.minimum(lo, chunk.min(axis=0), out=lo)
+        np.maximum(hi, chunk.max(axis=0), out=hi)
+    return lo, hi
+
+
+def normalize_components(components, lo, hi):
+    # Min/max scaling; a constant column normalizes to 0 like the original normalize()
+    span = hi - lo
+    safe_span = np.where(span > 0, span, 1.0)
+    return np.where(span > 0, (components - lo) / safe_span, 0.0)
+
+
+def virality_scores(components, lo, hi, weights=DEFAULT_WEIGHTS):
+    return normalize_components(components, lo, hi) @ np.asarray(weights, dtype=np.float64)
+
+
+def top_k_virality(components, k=3, weights=DEFAULT_WEIGHTS):
+    """Return (indices, scores) of the k most viral rows, best first.
+
+    Uses np.argpartition so only the k winners are ever sorted.
+    """
+    n = len(components)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+
+    lo, hi = normalization_bounds([components])
+    scores = virality_scores(components, lo, hi, weights)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    order = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return order, scores[order]
+
+
+def _iter_metric_chunks(conn, chunksize, query=POST_METRICS_QUERY):
+    cursor = conn.execute(query)
+    while True:
+        rows = cursor.fetchmany(chunksize)
+        if not rows:
+            break
+        block = np.asarray(rows, dtype=np.int64)
+        yield block[:, 0], virality_components(block[:, 1], block[:, 2], block[:, 3])
+
+
+def stream_top_k_virality(conn, k=3, weights=DEFAULT_WEIGHTS, chunksize=50_000):
+    """Rank posts straight from the database without materializing a frame.
+
+    Pass 1 streams the metrics to find the normalization bounds, pass 2
+    streams them again keeping a bounded min-heap of the k best posts.
+    Reads ingest.py's summary tables while they cover every base row.
+    Returns a list of (post_id, virality_score), best first.
+    """
+    if k <= 0:
+        return []
+    query = SUMMARY_METRICS_QUERY if summaries_ready(conn) else POST_METRICS_QUERY
+
+    lo, hi = normalization_bounds(
+        components for _, components in _iter_metric_chunks(conn, chunksize, query)
+    )
+
+    heap = []
+    for post_ids, components in _iter_metric_chunks(conn, chunksize, query):
+        scores = virality_scores(components, lo, hi, weights)
+        # Pre-select inside the chunk so the heap only sees real contenders
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            post_ids, scores = post_ids[keep], scores[keep]
+        for post_id, score in zip(post_ids.tolist(), scores.tolist()):
+            if len(heap) < k:
+                heapq.heappush(heap, (score, post_id))
+            elif score > heap[0][0]:
+                heapq.heapreplace(heap, (score, post_id))
+
+    return [(post_id, score) for score, post_id in sorted(heap, reverse=True)]
@@ -0,0 +1,230 @@
+import argparse
+import heapq
+import sqlite3
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+# Exercise 2.2 - "What is going viral right now"
+#
+# Keeps per-post reaction/comment counters for a sliding time window and
+# refreshes them incrementally: every tick only reads comments and reactions
+# with an id above the last one seen, and events that fall out of the window
+# are popped off a min-heap so old posts age out instead of dominating. The
+# first tick reads just the window itself through a created_at index, so
+# startup doesn't depend on how much history the tables hold.
+
+
+def prepare_database(conn):
+    """Give reactions a created_at column so the window can be enforced.
+
+    SQLite can't ADD COLUMN with a CURRENT_TIMESTAMP default, so the column is
+    added as nullable and an AFTER INSERT trigger stamps new rows. Existing
+    reactions never had a timestamp; they are backfilled with their post's
+    created_at, the earliest moment they could have happened.
+    Safe to call repeatedly.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(reactions);")]
+    with conn:
+        if 'created_at' not in columns:
+            conn.execute("ALTER TABLE reactions ADD COLUMN created_at TIMESTAMP;")
+            conn.execute("""
+                UPDATE reactions
+                SET created_at = (SELECT p.created_at FROM posts p WHERE p.id = reactions.post_id)
+                WHERE created_at IS NULL;
+            """)
+        conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS reactions_created_at
+            AFTER INSERT ON reactions
+            WHEN NEW.created_at IS NULL
+            BEGIN
+                UPDATE reactions SET created_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+            END;
+        """)
+        # Follower lookups for newly seen posts
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_follows_followed ON follows(followed_id);")
+        # The first tick's range scan over the window
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_comments_created ON comments(created_at);")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reactions_created ON reactions(created_at);")
+
+
+class SlidingWindowVirality:
+    """Incremental virality over the last `window_seconds` of activity.
+
+    Time is event time: unless `now` is passed to tick(), the window ends at
+    the newest event seen so far, which also makes replaying history work.
+    """
+
+    def __init__(self, window_seconds=24 * 3600, weights=None):
+        self.window_seconds = window_seconds
+        self.weights = weights
+        self.last_comment_id = 0
+        self.last_reaction_id = 0
+        self.watermark = 0
+        self.reaction_counts = defaultdict(int)
+        self.comment_counts = defaultdict(int)
+        self.post_followers = {}
+        # Events per post still in the window; a post leaves when it drops to zero
+        self._live = defaultdict(int)
+        # Posts that entered the window since the last follower lookup
+        self._entered = set()
+        # (timestamp, post_id, is_comment) for every event still in the window
+        self._events = []
+
+    def tick(self, conn, now=None):
+        if self.watermark == 0:
+            # First tick: place the window before reading so only events inside it are loaded
+            self.watermark = int(now) if now is not None else self._newest_event_time(conn)
+            new_events = self._read_window(conn, self.watermark - self.window_seconds)
+        else:
+            new_events = self._read_new_events(conn)
+        for ts, post_id, is_comment in new_events:
+            if is_comment:
+                self.comment_counts[post_id] += 1
+            else:
+                self.reaction_counts[post_id] += 1
+            self._live[post_id] += 1
+            if self._live[post_id] == 1:
+                self._entered.add(post_id)
+            heapq.heappush(self._events, (ts, post_id, is_comment))
+            if ts > self.watermark:
+                self.watermark = ts
+
+        if now is not None:
+            self.watermark = int(now)
+        expired = self._expire(self.watermark - self.window_seconds)
+        self._load_followers(conn)
+        return len(new_events), expired
+
+    def top(self, k=3):
+        """Return [(post_id, score, reactions, comments), ...] for the window, best first."""
+        # numpy is only needed for scoring; ingest.py reuses prepare_database without it
+        from virality import DEFAULT_WEIGHTS, top_k_virality, virality_components
+
+        post_ids = list(self._live)
+        if not post_ids:
+            return []
+        reactions = [self.reaction_counts.get(p, 0) for p in post_ids]
+        comments = [self.comment_counts.get(p, 0) for p in post_ids]
+        followers = [self.post_followers.get(p, 0) for p in post_ids]
+
+        components = virality_components(reactions, comments, followers)
+        top_idx, top_scores = top_k_virality(components, k=k, weights=self.weights or DEFAULT_WEIGHTS)
+        return [(post_ids[i], score, reactions[i], comments[i])
+                for i, score in zip(top_idx.tolist(), top_scores.tolist())]
+
+    def _newest_event_time(self, conn):
+        newest = [conn.execute(f"SELECT CAST(strftime('%s', MAX(created_at)) AS INTEGER) FROM {table};")
+                  .fetchone()[0] for table in ('comments', 'reactions')]
+        return max([ts for ts in newest if ts is not None], default=0)
+
+    def _read_window(self, conn, cutoff):
+        # created_at is stored as 'YYYY-MM-DD HH:MM:SS' text, which sorts like the time it holds
+        since = datetime.fromtimestamp(cutoff, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        events = []
+        for table, is_comment in (('comments', True), ('reactions', False)):
+            # Everything up to the current max id counts as read, in the window or not
+            last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table};").fetchone()[0]
+            rows = conn.execute(f"""
+                SELECT post_id, CAST(strftime('%s', created_at) AS INTEGER)
+                FROM {table} WHERE created_at >= ? AND id <= ?;
+            """, (since, last_id)).fetchall()
+            events += [(ts, post_id, is_comment) for post_id, ts in rows if ts is not None and ts >= cutoff]
+            if is_comment:
+                self.last_comment_id = last_id
+            else:
+                self.last_reaction_id = last_id
+        return events
+
+    def _read_new_events(self, conn):
+        comments = conn.execute("""
+            SELECT id, post_id, CAST(strftime('%s', created_at) AS INTEGER)
+            FROM comments WHERE id > ? ORDER BY id;
+        """, (self.last_comment_id,)).fetchall()
+        reactions = conn.execute("""
+            SELECT id, post_id, CAST(strftime('%s', created_at) AS INTEGER)
+            FROM reactions WHERE id > ? AND created_at IS NOT NULL ORDER BY id;
+        """, (self.last_reaction_id,)).fetchall()
+
+        if comments:
+            self.last_comment_id = comments[-1][0]
+        if reactions:
+            self.last_reaction_id = reactions[-1][0]
+
+        cutoff = self.watermark - self.window_seconds
+        events = [(ts, post_id, True) for _, post_id, ts in comments if ts is not None]
+        events += [(ts, post_id, False) for _, post_id, ts in reactions if ts is not None]
+        # Late arrivals that are already outside the window are never counted
+        return [event for event in events if event[0] >= cutoff]
+
+    def _expire(self, cutoff):
+        expired = 0
+        while self._events and self._events[0][0] < cutoff:
+            _, post_id, is_comment = heapq.heappop(self._events)
+            counts = self.comment_counts if is_comment else self.reaction_counts
+            counts[post_id] -= 1
+            if counts[post_id] == 0:
+                del counts[post_id]
+            # Posts with nothing left in the window drop out entirely
+            self._live[post_id] -= 1
+            if self._live[post_id] == 0:
+                del self._live[post_id]
+                self.post_followers.pop(post_id, None)
+                self._entered.discard(post_id)
+            expired += 1
+        return expired
+
+    def _load_followers(self, conn):
+        # Only posts that just entered the window need an author lookup
+        missing = [p for p in self._entered if p not in self.post_followers]
+        self._entered.clear()
+        for start in range(0, len(missing), 500):
+            batch = missing[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            rows = conn.execute(f"""
+                SELECT p.id, COUNT(f.follower_id)
+                FROM posts p
+                LEFT JOIN follows f ON f.followed_id = p.user_id
+                WHERE p.id IN ({placeholders})
+                GROUP BY p.id;
+            """, batch).fetchall()
+            self.post_followers.update(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sliding-window virality for recent posts")
+    parser.add_argument('--db', default="../database.sqlite")
+    parser.add_argument('--window-hours', type=float, default=24)
+    parser.add_argument('--interval', type=float, default=300, help="seconds between refreshes")
+    parser.add_argument('--top', type=int, default=3)
+    parser.add_argument('--once', action='store_true',
+                        help="refresh once and exit, with the window ending at the newest event")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    prepare_database(conn)
+    tracker = SlidingWindowVirality(window_seconds=int(args.window_hours * 3600))
+
+    while True:
+        started = time.perf_counter()
+        # Live refreshes follow the wall clock so events age out during a lull
+        new_events, expired = tracker.tick(conn, now=None if args.once else time.time())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        window_end = datetime.fromtimestamp(tracker.watermark, tz=timezone.utc)
+        print(f"\nWindow ending {window_end:%Y-%m-%d %H:%M:%S} UTC "
+              f"({args.window_hours:g}h): {new_events} new events, {expired} aged out, "
+              f"refresh took {elapsed_ms:.1f} ms")
+        for i, (post_id, score, reactions, comments) in enumerate(tracker.top(args.top)):
+            print(f"  #{i + 1} Post {post_id}: score {score:.4f} "
+                  f"({reactions} reactions, {comments} comments)")
+
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+# Load test for report_server.py
+#
+#   python report_server.py &
+#   python load_test.py --clients 50 --requests 200
+#
+# Each client keeps one HTTP/1.1 keep-alive connection open and cycles
+# through the report endpoints; latency is measured per request from write
+# to the end of the response body.
+
+DEFAULT_PATHS = ['/lurkers', '/influencers', '/spammers', '/viral?k=3', '/pairs?k=3']
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        header = await reader.readline()
+        if header in (b'\r\n', b''):
+            break
+        name, _, value = header.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, paths, requests, offset, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(requests):
+            path = paths[(offset + i) % len(paths)]
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            status = await read_response(reader)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if status == 200:
+                latencies.setdefault(path, []).append(elapsed_ms)
+            else:
+                errors.append((path, status))
+    finally:
+        writer.close()
+
+
+async def run(args):
+    latencies, errors = {}, []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(args.host, args.port, args.paths, args.requests, i, latencies, errors)
+        for i in range(args.clients)
+    ))
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.clients} clients x {args.requests} requests: {total:,} OK, {len(errors)} errors "
+          f"in {elapsed:.2f}s ({total / elapsed:,.0f} req/s)")
+    print(f"\n{'endpoint':<20}{'count':>8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}")
+    everything = []
+    for path in args.paths:
+        values = latencies.get(path, [])
+        everything += values
+        if values:
+            print(f"{path:<20}{len(values):>8}{statistics.median(values):>10.2f}"
+                  f"{percentile(values, 99):>10.2f}{max(values):>10.2f}")
+    if everything:
+        print(f"{'all':<20}{len(everything):>8}{statistics.median(everything):>10.2f}"
+              f"{percentile(everything, 99):>10.2f}{max(everything):>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent latency test for report_server.py")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=200, help="requests per client")
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
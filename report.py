@@ -0,0 +1,286 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+# Single entry point for the exercise reports
+#
+#   python report.py schema|lurkers|influencers|spammers             Exercise 1, plain sqlite3 text
+#   python report.py growth|virality|lifecycle|connections           Exercise 2 scripts (plots)
+#   python report.py viral-now|decay|graph|ingest|forecast|regional  Ex2 tools, extra args passed through
+#   python report.py startup-bench                                   python -X importtime per subcommand
+#
+# Only the standard library is imported at module level; pandas, numpy and
+# matplotlib are imported by the code path that needs them, so the text
+# reports start in tens of milliseconds.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+EX2_DIR = os.path.join(ROOT_DIR, 'Ex2')
+DEFAULT_DB = os.path.join(ROOT_DIR, 'database.sqlite')
+
+# Exercise 2 scripts; the modules each one pulls in are read from its imports
+EX2_SCRIPTS = {
+    'growth': 'task2.1.py',
+    'virality': 'task2.2.py',
+    'lifecycle': 'task2.3.py',
+    'connections': 'task2.4.py',
+}
+
+# Ex2 tools with their own argparse main()
+EX2_TOOLS = {
+    'viral-now': 'virality_window',
+    'decay': 'decay_curves',
+    'graph': 'graph_analytics',
+    'ingest': 'ingest',
+    'forecast': 'forecasting',
+    'regional': 'regional',
+}
+
+
+def connect(db_path):
+    return sqlite3.connect(db_path)
+
+
+def print_table(headers, rows):
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max([len(header)] + [len(row[i]) for row in rows]) for i, header in enumerate(headers)]
+    print('  '.join(header.ljust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print('  '.join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+# The Exercise 1 queries live here; Excercise1.py runs the same ones through pandas
+
+# Excercise 1.1
+def query_schema(conn):
+    # [(table, [(column, type), ...], row_count), ...]
+    tables = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name != 'sqlite_sequence';"
+    ).fetchall()
+    schema = []
+    for (table,) in tables:
+        columns = conn.execute(f"PRAGMA table_info({table});").fetchall()
+        row_count = conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+        schema.append((table, [(column[1], column[2]) for column in columns], row_count))
+    return schema
+
+
+def report_schema(conn):
+    for table, columns, row_count in query_schema(conn):
+        print(f"\nTable: {table}")
+        print("Columns:")
+        print_table(['name', 'type'], columns)
+        print(f"Number of rows: {row_count}")
+
+
+# Excercise 1.2
+LURKERS_QUERY = """
+SELECT COUNT(*) FROM users
+WHERE id NOT IN (
+    SELECT user_id FROM posts
+    UNION
+    SELECT user_id FROM comments
+    UNION
+    SELECT user_id FROM reactions
+);
+"""
+
+
+def query_lurkers(conn):
+    return conn.execute(LURKERS_QUERY).fetchone()[0]
+
+
+def report_lurkers(conn):
+    print("Number of lurkers:", query_lurkers(conn))
+
+
+# Excercise 1.3
+INFLUENCER_COLUMNS = ['user_id', 'username', 'total_reactions', 'total_comments', 'engagement_score']
+
+INFLUENCERS_QUERY = """
+SELECT u.id AS user_id, u.username,
+       COUNT(DISTINCT r.id) AS total_reactions,
+       COUNT(DISTINCT c.id) AS total_comments,
+       (COUNT(DISTINCT r.id) + COUNT(DISTINCT c.id)) AS engagement_score
+FROM users u
+LEFT JOIN posts p ON u.id = p.user_id
+LEFT JOIN reactions r ON p.id = r.post_id
+LEFT JOIN comments c ON p.id = c.post_id
+GROUP BY u.id, u.username
+ORDER BY engagement_score DESC
+LIMIT ?;
+"""
+
+
+def query_influencers(conn, limit=5):
+    return conn.execute(INFLUENCERS_QUERY, (limit,)).fetchall()
+
+
+def report_influencers(conn):
+    print_table(INFLUENCER_COLUMNS, query_influencers(conn))
+
+
+# Excercise 1.4
+SPAMMER_COLUMNS = ['user_id', 'content', 'repeat_count', 'source']
+
+# Repeats are grouped on the full text; only the first 200 characters are returned
+SPAMMERS_QUERY = """
+SELECT user_id, substr(content, 1, 200) as content, COUNT(*) as repeat_count, 'post' as source
+FROM posts
+GROUP BY user_id, posts.content
+HAVING COUNT(*) >= 3
+
+UNION ALL
+
+SELECT user_id, substr(content, 1, 200) as content, COUNT(*) as repeat_count, 'comment' as source
+FROM comments
+GROUP BY user_id, comments.content
+HAVING COUNT(*) >= 3;
+"""
+
+
+def query_spammers(conn):
+    return conn.execute(SPAMMERS_QUERY).fetchall()
+
+
+def report_spammers(conn):
+    rows = [(user_id, content if len(content) <= 60 else content[:57] + '...', count, source)
+            for user_id, content, count, source in query_spammers(conn)]
+    print_table(SPAMMER_COLUMNS, rows)
+
+
+EX1_REPORTS = {
+    'schema': report_schema,
+    'lurkers': report_lurkers,
+    'influencers': report_influencers,
+    'spammers': report_spammers,
+}
+
+
+def script_imports(path):
+    """Modules a script imports at top level, in source order."""
+    import ast
+
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            modules.append(node.module)
+    return modules
+
+
+def run_ex2_script(name, imports_only=False):
+    import importlib
+    import runpy
+
+    path = os.path.join(EX2_DIR, EX2_SCRIPTS[name])
+    # The scripts read ../database.sqlite and save their plots next to themselves
+    os.chdir(EX2_DIR)
+    sys.path.insert(0, EX2_DIR)
+    if imports_only:
+        # Exactly what the script's own import block loads, without drawing plots
+        for module in script_imports(path):
+            importlib.import_module(module)
+        return
+    runpy.run_path(path, run_name='__main__')
+
+
+def run_ex2_tool(name, tool_args):
+    import importlib
+
+    os.chdir(EX2_DIR)
+    sys.path.insert(0, EX2_DIR)
+    module = importlib.import_module(EX2_TOOLS[name])
+    sys.argv = [f"{os.path.basename(sys.argv[0])} {name}"] + tool_args
+    module.main()
+
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"; top-level
+    # imports have no indentation, and their cumulative times add up to the total
+    total_us = 0
+    heaviest = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        cumulative_us, name = int(fields[1]), fields[2]
+        if not name.startswith('  '):
+            total_us += cumulative_us
+            heaviest.append((cumulative_us, name.strip()))
+    heaviest.sort(reverse=True)
+    return total_us, heaviest
+
+
+def startup_bench(commands, repeat):
+    import statistics
+    import subprocess
+    import time
+
+    print(f"{'subcommand':<14}{'imports (ms)':>14}{'wall (ms)':>12}  heaviest top-level imports")
+    for command in commands:
+        argv = [sys.executable, '-X', 'importtime', os.path.abspath(__file__), command]
+        if command in EX2_SCRIPTS:
+            # Measure what the script would import without drawing or saving plots
+            argv.append('--imports-only')
+        elif command in EX2_TOOLS:
+            argv.append('--help')
+
+        import_ms, wall_ms = [], []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                    text=True, cwd=ROOT_DIR)
+            wall_ms.append((time.perf_counter() - started) * 1000)
+            total_us, heaviest = parse_importtime(result.stderr)
+            import_ms.append(total_us / 1000)
+
+        top = ', '.join(f"{name} {us / 1000:.0f}" for us, name in heaviest[:3])
+        print(f"{command:<14}{statistics.median(import_ms):>14.1f}{statistics.median(wall_ms):>12.1f}  {top}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Social media analytics reports")
+    parser.add_argument('--db', default=DEFAULT_DB, help="database for the Exercise 1 reports")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, func in EX1_REPORTS.items():
+        subparsers.add_parser(name, help=f"Exercise 1: {name}")
+    for name, script in EX2_SCRIPTS.items():
+        script_parser = subparsers.add_parser(name, help=f"Exercise 2: run {script}")
+        script_parser.add_argument('--imports-only', action='store_true',
+                                   help="load the script's dependencies and exit")
+    for name, module in EX2_TOOLS.items():
+        # Everything after the subcommand, --help included, goes to the tool
+        subparsers.add_parser(name, help=f"run Ex2/{module}.py", add_help=False)
+
+    bench_parser = subparsers.add_parser('startup-bench', help="import-time cost per subcommand")
+    bench_parser.add_argument('commands', nargs='*',
+                              default=list(EX1_REPORTS) + list(EX2_SCRIPTS) + list(EX2_TOOLS))
+    bench_parser.add_argument('--repeat', type=int, default=3)
+
+    args, tool_args = parser.parse_known_args()
+    if tool_args and args.command not in EX2_TOOLS:
+        parser.error(f"unrecognized arguments: {' '.join(tool_args)}")
+
+    if args.command in EX1_REPORTS:
+        conn = connect(args.db)
+        try:
+            EX1_REPORTS[args.command](conn)
+        finally:
+            conn.close()
+    elif args.command in EX2_SCRIPTS:
+        run_ex2_script(args.command, imports_only=args.imports_only)
+    elif args.command in EX2_TOOLS:
+        run_ex2_tool(args.command, tool_args)
+    else:
+        startup_bench(args.commands, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
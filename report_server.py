@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import report
+
+# Local HTTP report server
+#
+#   python report_server.py --port 8080
+#   curl localhost:8080/viral?k=3
+#
+# One warm asyncio process answers the exercise queries as JSON. The
+# summaries are computed at startup (and every --refresh seconds) on
+# read-only SQLite connections kept open by a bounded thread pool, so the
+# event loop never blocks on SQLite and a request is just a dict lookup
+# plus json.dumps.
+
+# Ranked reports keep this many rows; ?k= slices them
+CACHED_ROWS = 50
+
+PAIRS_QUERY = """
+WITH directed AS (
+    SELECT c.user_id as engager_id, p.user_id as content_owner_id, 1 as comments, 0 as reactions
+    FROM comments c
+    JOIN posts p ON c.post_id = p.id
+    WHERE c.user_id != p.user_id
+    UNION ALL
+    SELECT r.user_id, p.user_id, 0, 1
+    FROM reactions r
+    JOIN posts p ON r.post_id = p.id
+    WHERE r.user_id != p.user_id
+),
+pairs AS (
+    SELECT MIN(engager_id, content_owner_id) as user1_id,
+           MAX(engager_id, content_owner_id) as user2_id,
+           SUM(comments) as comment_count,
+           SUM(reactions) as reaction_count,
+           SUM(comments) * 2 + SUM(reactions) as engagement_score
+    FROM directed
+    GROUP BY user1_id, user2_id
+)
+SELECT pairs.user1_id, u1.username, pairs.user2_id, u2.username,
+       engagement_score, comment_count, reaction_count
+FROM pairs
+JOIN users u1 ON u1.id = pairs.user1_id
+JOIN users u2 ON u2.id = pairs.user2_id
+ORDER BY engagement_score DESC
+LIMIT ?;
+"""
+
+
+def build_lurkers(conn):
+    return {'lurker_count': report.query_lurkers(conn)}
+
+
+def build_influencers(conn):
+    return [dict(zip(report.INFLUENCER_COLUMNS, row))
+            for row in report.query_influencers(conn, limit=CACHED_ROWS)]
+
+
+def build_spammers(conn):
+    return [dict(zip(report.SPAMMER_COLUMNS, row)) for row in report.query_spammers(conn)]
+
+
+def build_viral(conn):
+    if report.EX2_DIR not in sys.path:
+        sys.path.insert(0, report.EX2_DIR)
+    from virality import stream_top_k_virality
+
+    ranked = stream_top_k_virality(conn, k=CACHED_ROWS)
+    if not ranked:
+        return []
+    placeholders = ','.join('?' * len(ranked))
+    details = {row[0]: row[1:] for row in conn.execute(f"""
+        SELECT p.id, p.user_id, u.username, p.created_at, substr(p.content, 1, 200)
+        FROM posts p
+        LEFT JOIN users u ON u.id = p.user_id
+        WHERE p.id IN ({placeholders});
+    """, [post_id for post_id, _ in ranked]).fetchall()}
+
+    viral = []
+    for post_id, score in ranked:
+        user_id, username, created_at, preview = details.get(post_id, (None, None, None, None))
+        viral.append({'post_id': post_id, 'virality_score': round(score, 6), 'user_id': user_id,
+                      'username': username, 'created_at': created_at, 'content_preview': preview})
+    return viral
+
+
+def build_pairs(conn):
+    columns = ['user1_id', 'user1_name', 'user2_id', 'user2_name',
+               'engagement_score', 'comment_count', 'reaction_count']
+    return [dict(zip(columns, row)) for row in conn.execute(PAIRS_QUERY, (CACHED_ROWS,))]
+
+
+REPORTS = {
+    'lurkers': build_lurkers,
+    'influencers': build_influencers,
+    'spammers': build_spammers,
+    'viral': build_viral,
+    'pairs': build_pairs,
+}
+
+
+class ReportServer:
+    def __init__(self, db_path, workers=4):
+        self.db_uri = f"file:{os.path.abspath(db_path)}?mode=ro"
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sqlite')
+        self._local = threading.local()
+        self.reports = {}
+        self.encoded = {}
+        self.refreshed_at = None
+
+    def _connection(self):
+        # One warm read-only connection per pool thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_uri, uri=True)
+            self._local.conn = conn
+        return conn
+
+    async def run_query(self, func):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: func(self._connection()))
+
+    async def refresh(self):
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self.run_query(build) for build in REPORTS.values()))
+        self.reports = dict(zip(REPORTS, results))
+        self.encoded = {name: json.dumps(value).encode() for name, value in self.reports.items()}
+        self.refreshed_at = time.time()
+        print(f"Summaries refreshed in {(time.perf_counter() - started) * 1000:.0f} ms", file=sys.stderr)
+
+    async def refresh_forever(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # Keep serving the previous summaries and try again next interval
+                print("Refresh failed:", file=sys.stderr)
+                traceback.print_exc()
+
+    def route(self, method, target):
+        if method != 'GET':
+            return 405, json.dumps({'error': 'only GET is supported'}).encode()
+        url = urlsplit(target)
+        name = url.path.strip('/')
+
+        if name == '':
+            return 200, json.dumps({'reports': sorted(REPORTS)}).encode()
+        if name == 'health':
+            return 200, json.dumps({'refreshed_at': self.refreshed_at}).encode()
+        if name not in self.reports:
+            return 404, json.dumps({'error': f'unknown report {name!r}'}).encode()
+
+        k = parse_qs(url.query).get('k')
+        if k is None or not isinstance(self.reports[name], list):
+            return 200, self.encoded[name]
+        try:
+            k = int(k[0])
+        except ValueError:
+            return 400, json.dumps({'error': 'k must be an integer'}).encode()
+        return 200, json.dumps(self.reports[name][:max(k, 0)]).encode()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = request_line.rstrip().endswith(b'HTTP/1.1')
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    if name.strip().lower() == 'connection':
+                        keep_alive = value.strip().lower() == 'keep-alive'
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body = 400, json.dumps({'error': 'bad request'}).encode()
+                else:
+                    status, body = self.route(parts[0], parts[1])
+
+                reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                          405: 'Method Not Allowed'}[status]
+                writer.write(
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    server = ReportServer(args.db, workers=args.workers)
+    await server.refresh()
+    if args.refresh > 0:
+        asyncio.create_task(server.refresh_forever(args.refresh))
+
+    http = await asyncio.start_server(server.handle, args.host, args.port)
+    print(f"Serving {', '.join('/' + name for name in REPORTS)} on http://{args.host}:{args.port}",
+          file=sys.stderr)
+    async with http:
+        await http.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the exercise reports as JSON over HTTP")
+    parser.add_argument('--db', default=report.DEFAULT_DB)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=4, help="SQLite thread pool size")
+    parser.add_argument('--refresh', type=float, default=300,
+                        help="seconds between summary refreshes, 0 to disable")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()